@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare the rendering of a hot template, i.e. compiled once and rendered
+many times, with the regex path which parses the template on every render.
+
+    python benchmarks/codegen.py
+"""
+
+import timeit
+
+from varsubst.interpolators import ShellInterpolator
+from varsubst.resolvers import DictResolver
+
+TEMPLATE = ' '.join(
+    f'key{i}=$KEY{i} ${{OPT{i}:-default $KEY{i}}} ${{OTHER{i}-none}}'
+    for i in range(20))
+RESOLVER = DictResolver({f'KEY{i}': f'value{i}' for i in range(20)})
+NUMBER = 2000
+
+
+def main() -> None:
+    cases = [
+        ('regex, parsed on every render',
+         ShellInterpolator(fail_on_unresolved=True, engine='regex')),
+        ('scanner, parsed on every render',
+         ShellInterpolator(fail_on_unresolved=True, engine='scanner')),
+        ('cached segments',
+         ShellInterpolator(fail_on_unresolved=True, cache_size=8)),
+        ('cached generated function',
+         ShellInterpolator(fail_on_unresolved=True, cache_size=8,
+                           codegen=True)),
+    ]
+    expected = cases[0][1].render(TEMPLATE, RESOLVER)
+    baseline = None
+    for name, interpolator in cases:
+        assert interpolator.render(TEMPLATE, RESOLVER) == expected
+        elapsed = min(timeit.repeat(
+            lambda: interpolator.render(TEMPLATE, RESOLVER),
+            number=NUMBER, repeat=5))
+        baseline = baseline or elapsed
+        print(f'{name:<35} {elapsed / NUMBER * 1e6:8.2f} us/render '
+              f'x{baseline / elapsed:.1f}')
+
+
+if __name__ == '__main__':
+    main()
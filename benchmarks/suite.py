@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Measure the throughput and peak memory of the interpolators over a matrix
+of template shapes and resolvers.
+
+    python benchmarks/suite.py --save baseline.json
+    python benchmarks/suite.py --compare baseline.json --threshold 0.2
+
+With --compare, the exit status is 1 if a case renders slower, or uses
+more memory, than the baseline by more than the threshold.
+"""
+
+import itertools
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from varsubst.interpolators import BaseInterpolator, ShellInterpolator
+from varsubst.resolvers import BaseResolver, DictResolver, EnvResolver
+
+PREFIX = 'VARSUBST_BENCH_'
+SIZES = {'small': 10, 'large': 1000}
+FILLERS = {'dense': ' ', 'sparse': ' lorem ipsum dolor sit amet ' * 8}
+DISTINCT_KEYS = {'distinct': None, 'repeated': 5}
+# forms of the variables: ${KEY}, $KEY, or ${OPT:-$KEY}
+FORMS = ['braced', 'bare', 'defaults']
+INTERPOLATORS = ['shell', 'shell-cached', 'shell-codegen', 'jinja']
+
+
+class Case(NamedTuple):
+    interpolator: str
+    resolver: str
+    size: str
+    density: str
+    keys: str
+    form: str
+
+    @property
+    def name(self) -> str:
+        return '/'.join([self.interpolator, self.resolver, self.size,
+                         self.density, self.keys, self.form])
+
+
+def _key(case: Case, index: int) -> str:
+    distinct = DISTINCT_KEYS[case.keys]
+    return f'{PREFIX}KEY{index if distinct is None else index % distinct}'
+
+
+def _variable(case: Case, index: int) -> str:
+    key = _key(case, index)
+    if case.interpolator == 'jinja':
+        if case.form == 'defaults':
+            return f'{{{{ {PREFIX}OPT{index} | default({key}) }}}}'
+        return f'{{{{ {key} }}}}'
+    if case.form == 'defaults':
+        return f'${{{PREFIX}OPT{index}:-${key}}}'
+    if case.form == 'bare':
+        return f'${key}'
+    return f'${{{key}}}'
+
+
+def make_template(case: Case) -> str:
+    """
+    :return: a template of the shape of the case, whose variables are all
+        resolved by the resolver of the case
+    """
+    filler = FILLERS[case.density]
+    return filler.join(_variable(case, index)
+                       for index in range(SIZES[case.size]))
+
+
+def make_interpolator(name: str) -> BaseInterpolator:
+    if name == 'shell':
+        return ShellInterpolator(fail_on_unresolved=True)
+    if name == 'shell-cached':
+        return ShellInterpolator(fail_on_unresolved=True, cache_size=128)
+    if name == 'shell-codegen':
+        return ShellInterpolator(fail_on_unresolved=True, cache_size=128,
+                                 codegen=True)
+    from varsubst.interpolators.jinja_interpolator import JinjaInterpolator
+    return JinjaInterpolator()
+
+
+def make_resolver(name: str) -> BaseResolver:
+    values = {f'{PREFIX}KEY{index}': f'value{index}'
+              for index in range(max(SIZES.values()))}
+    if name == 'dict':
+        return DictResolver(values)
+    os.environ.update(values)
+    return EnvResolver()
+
+
+def cases(interpolators: List[str], resolvers: List[str],
+          sizes: List[str]) -> Iterator[Case]:
+    for values in itertools.product(interpolators, resolvers, sizes,
+                                    FILLERS, DISTINCT_KEYS, FORMS):
+        case = Case(*values)
+        # jinja has a single form of plain variables
+        if case.interpolator == 'jinja' and case.form == 'bare':
+            continue
+        yield case
+
+
+def measure(render: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    :return: the number of renders per second, the best of repeat runs, and
+        the peak memory allocated by a render
+    """
+    timer = timeit.Timer(render)
+    number, _ = timer.autorange()
+    elapsed = min(timer.repeat(repeat=repeat, number=number)) / number
+    tracemalloc.start()
+    try:
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'renders_per_second': 1 / elapsed, 'peak_memory': peak}
+
+
+def run(selected: List[Case], repeat: int,
+        name_filter: Optional[str]) -> Dict[str, Dict[str, float]]:
+    interpolators: Dict[str, BaseInterpolator] = {}
+    resolvers: Dict[str, BaseResolver] = {}
+    results = {}
+    for case in selected:
+        if name_filter and name_filter not in case.name:
+            continue
+        if case.interpolator not in interpolators:
+            interpolators[case.interpolator] = \
+                make_interpolator(case.interpolator)
+        if case.resolver not in resolvers:
+            resolvers[case.resolver] = make_resolver(case.resolver)
+        interpolator = interpolators[case.interpolator]
+        resolver = resolvers[case.resolver]
+        template = make_template(case)
+        output_size = len(interpolator.render(template, resolver).encode())
+        result = measure(lambda: interpolator.render(template, resolver),
+                         repeat)
+        result['bytes_per_second'] = \
+            result['renders_per_second'] * output_size
+        results[case.name] = result
+        print(f"{case.name:<55} {result['renders_per_second']:12.0f} "
+              f"renders/s {result['bytes_per_second'] / 1e6:8.2f} MB/s "
+              f"{result['peak_memory'] / 1024:8.1f} KiB")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    :return: a description of each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        slowdown = 1 - (result['renders_per_second']
+                        / expected['renders_per_second'])
+        if slowdown > threshold:
+            regressions.append(f"{name}: {slowdown:.0%} slower")
+        growth = result['peak_memory'] / max(expected['peak_memory'], 1) - 1
+        if growth > threshold:
+            regressions.append(f"{name}: {growth:.0%} more memory")
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--interpolators', nargs='+',
+                        default=INTERPOLATORS, choices=INTERPOLATORS)
+    parser.add_argument('--resolvers', nargs='+', default=['dict', 'env'],
+                        choices=['dict', 'env'])
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES),
+                        choices=list(SIZES))
+    parser.add_argument('--filter', help="only run cases containing it")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', metavar='JSON',
+                        help="save the results as a baseline")
+    parser.add_argument('--compare', metavar='JSON',
+                        help="compare the results with a baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="maximum ratio of slowdown or memory growth")
+    args = parser.parse_args()
+    selected = list(cases(args.interpolators, args.resolvers, args.sizes))
+    results = run(selected, args.repeat, args.filter)
+    if args.save:
+        with open(args.save, 'w') as writer:
+            json.dump({'python': platform.python_version(),
+                       'results': results}, writer, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as reader:
+            baseline = json.load(reader)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"regression {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
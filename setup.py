@@ -5,11 +5,15 @@ from os.path import basename, splitext
 from setuptools import find_packages, setup
 
 this_directory = path.abspath(path.dirname(__file__))
+version = {}
+with open(path.join(this_directory, 'src', 'varsubst', 'version.py'),
+          encoding='utf-8') as f:
+    exec(f.read(), version)
 with open(path.join(this_directory, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
     setup(
         name='varsubst',
-        version='2.0.0',
+        version=version['__version__'],
         url='https://github.com/tiboun/varsubst',
         author='Bounkong Khamphousone',
         author_email='bounkong@gmail.com',
@@ -24,6 +28,10 @@ with open(path.join(this_directory, 'README.md'), encoding='utf-8') as f:
         long_description=long_description,
         long_description_content_type='text/markdown',
         extras_require={
-            'jinja2':  ["jinja2"]
+            'jinja2':  ["jinja2"],
+            'yaml': ["pyyaml"]
+        },
+        entry_points={
+            'console_scripts': ['varsubst=varsubst.cli:main']
         }
     )
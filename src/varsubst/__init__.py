@@ -22,12 +22,30 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from typing import Iterable, List, Optional, Union
+
 from varsubst.interpolators import BaseInterpolator, ShellInterpolator
-from varsubst.resolvers import BaseResolver, EnvResolver
+from varsubst.resolvers import AsyncBaseResolver, BaseResolver, EnvResolver
+from varsubst.version import __version__  # noqa: F401
+
+_default_interpolator = ShellInterpolator(fail_on_unresolved=True)
 
 
 def varsubst(template: str, *,
-             interpolator: BaseInterpolator =
-             ShellInterpolator(fail_on_unresolved=True),
+             interpolator: BaseInterpolator = _default_interpolator,
              resolver: BaseResolver = EnvResolver()) -> str:
     return interpolator.render(template, resolver)
+
+
+def varsubst_many(templates: Iterable[str], *,
+                  interpolator: BaseInterpolator = _default_interpolator,
+                  resolver: BaseResolver = EnvResolver()) -> List[str]:
+    return interpolator.render_many(templates, resolver)
+
+
+async def avarsubst(template: str, *,
+                    interpolator: BaseInterpolator = _default_interpolator,
+                    resolver: Union[BaseResolver, AsyncBaseResolver] =
+                    EnvResolver(),
+                    concurrency: Optional[int] = None) -> str:
+    return await interpolator.arender(template, resolver, concurrency)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of a cache.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    """
+    Thread-safe mapping bounded to maxsize entries. The least recently used
+    entry is evicted when the cache is full. Entries may also expire after a
+    given time to live.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """
+        :param maxsize: maximum number of entries kept in the cache
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value cached for key, or default if there is none.
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if expires_at is not None and expires_at <= monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any,
+            ttl: Optional[float] = None) -> None:
+        """
+        Cache value for key, evicting the least recently used entry if needed.
+
+        :param ttl: if set, number of seconds after which the entry expires
+        """
+        expires_at = None if ttl is None else monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Remove the entry of key if any.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self.maxsize, len(self._entries))
+
+    def __getstate__(self) -> dict:
+        # entries may not be picklable, a copy starts empty.
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['maxsize'])
+
+    def __len__(self) -> int:
+        return len(self._entries)
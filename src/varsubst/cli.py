@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import BaseInterpolator, ShellInterpolator
+from varsubst.resolvers import (BaseResolver, DotenvResolver, EnvResolver,
+                                JsonResolver)
+
+
+class _CountingResolver(BaseResolver):
+    """
+    Record the distinct keys resolved through another resolver.
+    """
+
+    def __init__(self, inner: BaseResolver) -> None:
+        self.inner = inner
+        self.keys: Dict[str, None] = {}
+        self.values_count: Optional[int] = None
+
+    def resolve(self, key: str):
+        self.keys[key] = None
+        return self.inner.resolve(key)
+
+    def resolve_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        self.keys.update(dict.fromkeys(keys))
+        return self.inner.resolve_many(keys)
+
+    def values(self):
+        values = self.inner.values()
+        self.values_count = len(values)
+        return values
+
+
+def _make_resolver(args: Namespace) -> BaseResolver:
+    if args.resolver == 'env':
+        return EnvResolver(snapshot=True)
+    if args.values is None:
+        raise ValueError(f"--values is required by the {args.resolver} "
+                         "resolver")
+    if args.resolver == 'dotenv':
+        return DotenvResolver(args.values)
+    return JsonResolver(args.values)
+
+
+def _make_interpolator(args: Namespace) -> BaseInterpolator:
+    if args.interpolator == 'shell':
+        return ShellInterpolator(args.fail_on_unresolved, cache_size=128)
+    # jinja2 is only imported when needed, to keep shell renderings fast
+    from jinja2 import Environment, StrictUndefined
+
+    from varsubst.interpolators.jinja_interpolator import JinjaInterpolator
+    if args.fail_on_unresolved:
+        return JinjaInterpolator(Environment(undefined=StrictUndefined))
+    return JinjaInterpolator(Environment())
+
+
+def _errors(args: Namespace) -> Tuple[type, ...]:
+    errors = (KeyUnresolvedException, OSError, ValueError)
+    if args.interpolator == 'jinja':
+        from jinja2 import TemplateError
+        errors += (TemplateError,)
+    return errors
+
+
+def _file_pairs(specs: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """
+    :param specs: in:out pairs of files or directories
+    :return: paths of the templates and of the rendered files. Directories
+        are walked, the rendered tree mirroring the templates one.
+    """
+    paths = []
+    out_paths = []
+    for spec in specs:
+        path, separator, out_path = spec.partition(':')
+        if not separator or not path or not out_path:
+            raise ValueError(f"{spec} must be an in:out pair")
+        if not os.path.isdir(path):
+            paths.append(path)
+            out_paths.append(out_path)
+            continue
+        for directory, _, files in os.walk(path):
+            out_directory = os.path.join(out_path,
+                                         os.path.relpath(directory, path))
+            os.makedirs(out_directory, exist_ok=True)
+            for name in sorted(files):
+                paths.append(os.path.join(directory, name))
+                out_paths.append(os.path.join(out_directory, name))
+    return paths, out_paths
+
+
+def _parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog='varsubst',
+        description="Substitute variables of templates. Without paths, "
+                    "stdin is rendered to stdout.")
+    parser.add_argument('paths', nargs='*', metavar='IN:OUT',
+                        help="template and rendered file, or directories "
+                             "rendered recursively")
+    parser.add_argument('-i', '--interpolator', choices=('shell', 'jinja'),
+                        default='shell', help="template syntax")
+    parser.add_argument('-r', '--resolver', choices=('env', 'dotenv', 'json'),
+                        default='env', help="source of the values")
+    parser.add_argument('-f', '--values', metavar='FILE',
+                        help="file of the dotenv or json resolver")
+    parser.add_argument('--fail-on-unresolved', action='store_true',
+                        help="fail if a variable is not resolved")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument('--stats', action='store_true',
+                        help="print time spent and keys resolved to stderr")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Entry point of the varsubst command.
+
+    :param argv: arguments, defaults to the ones of the command line
+    :return: exit status
+    """
+    args = _parser().parse_args(argv)
+    errors = _errors(args)
+    start = perf_counter()
+    try:
+        resolver = _CountingResolver(_make_resolver(args))
+        interpolator = _make_interpolator(args)
+        if args.paths:
+            # worker processes are only needed to render files
+            from varsubst.parallel import render_files
+            paths, out_paths = _file_pairs(args.paths)
+            render_files(paths, out_paths, interpolator=interpolator,
+                         resolver=resolver, max_workers=args.jobs)
+            count = len(paths)
+        else:
+            interpolator.render_stream(sys.stdin, sys.stdout, resolver)
+            sys.stdout.flush()
+            count = 1
+    except errors as e:
+        print(f"varsubst: {e}", file=sys.stderr)
+        return 1
+    if args.stats:
+        elapsed = perf_counter() - start
+        if resolver.values_count is None:
+            keys = f"{len(resolver.keys)} key(s) resolved"
+        else:
+            keys = f"{resolver.values_count} value(s) sent to workers"
+        print(f"varsubst: {count} template(s) rendered in {elapsed:.3f}s, "
+              f"{keys}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import atexit
+import marshal
+import os
+import tempfile
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple, Union
+from weakref import WeakSet
+
+from varsubst.version import __version__
+
+
+class DiskCache:
+    """
+    Values computed from templates, kept in a single file shared by
+    processes.
+
+    Values are keyed by the sha256 of the template. The file is named after
+    the varsubst version and the marshal format, so that values computed by
+    another version are ignored. It is loaded on the first lookup, and new
+    values are written with flush(), atomically, merging the values written
+    meanwhile by other processes. On a miss, the file is loaded again if
+    another process has written it since, at most once per check_interval.
+    Values must be supported by marshal.
+
+    With autoflush, caches still alive are flushed when the interpreter
+    exits. Worker processes of multiprocessing and concurrent.futures pools
+    do not run exit handlers: values put by a worker are only written if it
+    calls flush().
+    """
+
+    def __init__(self, directory: str, autoflush: bool = True,
+                 check_interval: float = 1) -> None:
+        """
+        :param directory: directory of the cache file, created if needed
+        :param autoflush: if true, flush when the interpreter exits
+        :param check_interval: minimum number of seconds between two checks
+            of the file for values written by other processes
+        """
+        self.directory = directory
+        self.autoflush = autoflush
+        self.check_interval = check_interval
+        self.path = os.path.join(
+            directory, f'varsubst-{__version__}-{marshal.version}.marshal')
+        self._lock = Lock()
+        self._entries: Optional[Dict[bytes, Any]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._pending: Dict[bytes, Any] = {}
+        self._checked = monotonic()
+        if autoflush:
+            _autoflushed.add(self)
+
+    @staticmethod
+    def _key(template: Union[str, bytes]) -> bytes:
+        if isinstance(template, bytes):
+            return sha256(b'b' + template).digest()
+        return sha256(b's' + template.encode('utf-8', 'surrogatepass')
+                      ).digest()
+
+    def _read(self) -> Tuple[Dict[bytes, Any], Optional[Tuple[int, int]]]:
+        """
+        :return: the values of the file and its signature, no value if the
+            file is missing or corrupted
+        """
+        try:
+            with open(self.path, 'rb') as reader:
+                stat = os.fstat(reader.fileno())
+                entries = marshal.load(reader)
+        except FileNotFoundError:
+            return {}, None
+        except (EOFError, ValueError, TypeError):
+            return {}, None
+        if not isinstance(entries, dict):
+            return {}, None
+        return entries, (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> Dict[bytes, Any]:
+        entries = self._entries
+        if entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries, self._signature = self._read()
+                entries = self._entries
+        return entries
+
+    def _changed(self) -> bool:
+        """
+        :return: true if the file has been written by another process since
+            it was loaded, checked at most once per check_interval
+        """
+        now = monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) != self._signature
+
+    def _reload(self) -> Dict[bytes, Any]:
+        with self._lock:
+            entries, signature = self._read()
+            entries.update(self._entries or {})
+            self._entries, self._signature = entries, signature
+        return entries
+
+    def get(self, template: Union[str, bytes]) -> Optional[Any]:
+        """
+        :return: the value cached for template, None if there is none
+        """
+        key = self._key(template)
+        value = self._load().get(key)
+        if value is None and self._changed():
+            value = self._reload().get(key)
+        return value
+
+    def put(self, template: Union[str, bytes], value: Any) -> None:
+        """
+        Cache value for template. It is written on the next flush.
+        """
+        key = self._key(template)
+        entries = self._load()
+        with self._lock:
+            entries[key] = value
+            self._pending[key] = value
+
+    def flush(self) -> None:
+        """
+        Write the values put since the last flush.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            # values written meanwhile by other processes are kept
+            entries, _ = self._read()
+            entries.update(self._entries or {})
+            entries.update(self._pending)
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as writer:
+                    marshal.dump(entries, writer)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            stat = os.stat(self.path)
+            self._entries = entries
+            self._signature = (stat.st_mtime_ns, stat.st_size)
+            self._pending = {}
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __getstate__(self) -> dict:
+        # values are loaded again from the file by a copy.
+        return {'directory': self.directory, 'autoflush': self.autoflush,
+                'check_interval': self.check_interval}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['directory'], state['autoflush'],
+                      state['check_interval'])
+
+
+# caches to flush at exit, without keeping them alive
+_autoflushed: WeakSet = WeakSet()
+
+
+def _flush_at_exit() -> None:
+    for disk_cache in list(_autoflushed):
+        try:
+            disk_cache.flush()
+        except OSError:
+            pass
+
+
+atexit.register(_flush_at_exit)
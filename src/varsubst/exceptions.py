@@ -22,10 +22,41 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from typing import Iterable, Optional
+
+
 class KeyUnresolvedException(Exception):
     """
     Raised when key is not resolved by a resolver while rendering.
     """
-    def __init__(self, key: str):
+    def __init__(self, key: str, source: Optional[str] = None):
+        """
+        :param source: if known, the template, e.g. a file, being rendered
+        """
         self.key = key
-        super().__init__(f"{key} hasn't been resolved while rendering")
+        self.source = source
+        message = f"{key} hasn't been resolved while rendering"
+        if source is not None:
+            message += f" {source}"
+        super().__init__(message)
+
+    def __reduce__(self):
+        return type(self), (self.key, self.source)
+
+
+class KeysUnresolvedException(KeyUnresolvedException):
+    """
+    Raised when several keys are not resolved while rendering templates
+    together. key is the first of them.
+    """
+    def __init__(self, keys: Iterable[str], source: Optional[str] = None):
+        self.keys = list(keys)
+        super().__init__(self.keys[0], source)
+        message = f"{', '.join(self.keys)} haven't been resolved while " \
+            "rendering"
+        if source is not None:
+            message += f" {source}"
+        self.args = (message,)
+
+    def __reduce__(self):
+        return type(self), (self.keys, self.source)
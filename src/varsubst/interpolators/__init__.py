@@ -23,9 +23,19 @@
 # SOFTWARE.
 
 from varsubst.interpolators.base_interpolator import BaseInterpolator
+from varsubst.interpolators.check_report import CheckReport, UnresolvedLocation
+from varsubst.interpolators.compiled_template import (CompiledTemplate,
+                                                      VariableInfo)
 from varsubst.interpolators.shell_interpolator import ShellInterpolator
+from varsubst.interpolators.template_set import RenderedTemplate, TemplateSet
 
 __all__ = [
     "BaseInterpolator",
-    "ShellInterpolator"
+    "CheckReport",
+    "CompiledTemplate",
+    "RenderedTemplate",
+    "ShellInterpolator",
+    "TemplateSet",
+    "UnresolvedLocation",
+    "VariableInfo"
 ]
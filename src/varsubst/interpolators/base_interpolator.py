@@ -22,7 +22,38 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from varsubst.resolvers import BaseResolver
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from varsubst.exceptions import KeysUnresolvedException, KeyUnresolvedException
+from varsubst.observers import RenderObserver, RenderStats
+from varsubst.resolvers import AsyncBaseResolver, BaseResolver
+
+
+class _MemoResolver(BaseResolver):
+    """
+    Resolve each key at most once with the given resolver.
+    """
+
+    def __init__(self, resolver: BaseResolver) -> None:
+        self.resolver = resolver
+        self.memo: Dict[str, Optional[Any]] = {}
+
+    def resolve(self, key: str) -> Optional[Any]:
+        try:
+            return self.memo[key]
+        except KeyError:
+            value = self.memo[key] = self.resolver.resolve(key)
+            return value
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        keys = list(keys)
+        missing = [key for key in keys if key not in self.memo]
+        if missing:
+            self.memo.update(self.resolver.resolve_many(missing))
+        return {key: self.memo[key] for key in keys}
+
+    def values(self) -> Dict[str, Any]:
+        return self.resolver.values()
 
 
 class BaseInterpolator:
@@ -31,8 +62,33 @@ class BaseInterpolator:
 
     An interpolator is intented to render a template with values
     provided by a resolver.
+
+    Observers are notified with the statistics of each call to render.
+    Without observers, rendering isn't instrumented at all.
     """
 
+    _observers: Tuple[RenderObserver, ...] = ()
+
+    def add_observer(self, observer: RenderObserver) -> None:
+        """
+        :param observer: notified after each render of this interpolator.
+            Observers are not sent to worker processes.
+        """
+        self._observers = self._observers + (observer,)
+
+    def remove_observer(self, observer: RenderObserver) -> None:
+        self._observers = tuple(o for o in self._observers
+                                if o is not observer)
+
+    def _notify(self, stats: RenderStats) -> None:
+        for observer in self._observers:
+            observer.on_render(stats)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop('_observers', None)
+        return state
+
     def render(self, template: str, resolver: BaseResolver) -> str:
         """
         :param template: String with shell-like variables.
@@ -45,3 +101,53 @@ class BaseInterpolator:
                 - ${USER-$DEFAULT_USER}
         """
         pass
+
+    def render_many(self, templates: Iterable[str],
+                    resolver: BaseResolver) -> List[str]:
+        """
+        Render several templates, resolving each key at most once.
+
+        :return: rendered templates, in the order of templates
+        :raise KeysUnresolvedException: with the keys which have not been
+            resolved by any of the templates
+        """
+        memo = _MemoResolver(resolver)
+        rendered = []
+        unresolved: Dict[str, None] = {}
+        for template in templates:
+            try:
+                rendered.append(self.render(template, memo))
+            except KeyUnresolvedException as e:
+                unresolved[e.key] = None
+        if unresolved:
+            raise KeysUnresolvedException(unresolved)
+        return rendered
+
+    def render_stream(self, reader: IO[str], writer: IO[str],
+                      resolver: BaseResolver,
+                      chunk_size: int = 65536) -> None:
+        """
+        Render the template read from reader into writer.
+
+        Interpolators which can render a template by chunks read it
+        chunk_size characters at once. Others read it entirely.
+
+        :param reader: file-like object providing the template
+        :param writer: file-like object receiving the rendered template
+        """
+        writer.write(self.render(reader.read(), resolver))
+
+    async def arender(self, template: str,
+                      resolver: Union[BaseResolver, AsyncBaseResolver],
+                      concurrency: Optional[int] = None) -> str:
+        """
+        Render the template with a resolver or an asynchronous resolver.
+
+        :param concurrency: if set, maximum number of keys being resolved at
+            the same time by an asynchronous resolver
+        """
+        if isinstance(resolver, AsyncBaseResolver):
+            raise NotImplementedError(
+                f"{type(self).__name__} doesn't support asynchronous "
+                "resolvers")
+        return self.render(template, resolver)
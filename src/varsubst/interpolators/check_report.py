@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from typing import NamedTuple, Optional, Tuple
+
+from varsubst.exceptions import KeysUnresolvedException
+
+
+class UnresolvedLocation(NamedTuple):
+    """
+    Reference to an unresolved key in a template.
+    """
+    key: str
+    source: str
+    """
+    Name of the template, e.g. its path.
+    """
+    offset: int
+    """
+    Position of the $ of the reference in the template.
+    """
+    line: int
+    column: int
+    """
+    Line and column of the reference, starting from 1.
+    """
+
+
+class CheckReport(NamedTuple):
+    """
+    Result of checking templates against a resolver.
+    """
+    templates: int
+    """
+    Number of templates checked.
+    """
+    keys: Tuple[str, ...]
+    """
+    Distinct unresolved keys, in order of appearance.
+    """
+    locations: Tuple[UnresolvedLocation, ...]
+
+    @property
+    def ok(self) -> bool:
+        """
+        :return: True if every required key is resolved
+        """
+        return not self.keys
+
+    def exception(self) -> Optional[KeysUnresolvedException]:
+        """
+        :return: an exception with all unresolved keys, None if there is
+            none
+        """
+        if not self.keys:
+            return None
+        sources = dict.fromkeys(location.source
+                                for location in self.locations)
+        return KeysUnresolvedException(self.keys, ', '.join(sources))
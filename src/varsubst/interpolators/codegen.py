@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Any, AnyStr, Callable, Mapping, Optional
+
+from varsubst.exceptions import KeyUnresolvedException
+
+
+def generate_source(segments: tuple, keys: tuple, required_keys: tuple,
+                    fail_on_unresolved: bool, empty: AnyStr) -> str:
+    """
+    Generate the source of a function substituting the given segments.
+
+    The function takes the values of the keys and returns the rendered
+    template. Each key is looked up once, defaults are plain conditionals
+    and the result is built with a single join.
+    """
+    variables = {key: f'v{index}' for index, key in enumerate(keys)}
+    lines = ['def substitute(values):']
+    if empty.__class__ is bytes:
+        lines.append('    get = encoder(values)')
+    else:
+        lines.append('    get = values.get')
+    for key, variable in variables.items():
+        lines.append(f'    {variable} = get({key!r})')
+    if fail_on_unresolved:
+        for key in required_keys:
+            lines.append(f'    if {variables[key]} is None:')
+            lines.append(f'        raise KeyUnresolvedException({key!r})')
+
+    def value(name: str) -> str:
+        return f'({variables[name]} or {empty!r})'
+
+    def default_value(default: tuple) -> str:
+        parts = [repr(segment) if segment.__class__ is not tuple
+                 else value(segment[0])
+                 for segment in default]
+        return ' + '.join(parts) if parts else repr(empty)
+
+    parts = []
+    for segment in segments:
+        if segment.__class__ is not tuple:
+            parts.append(repr(segment))
+            continue
+        name, operator, default = segment
+        if operator is None:
+            parts.append(value(name))
+        elif operator == ':-':
+            parts.append(f'({variables[name]} or {default_value(default)})')
+        else:
+            parts.append(f'({default_value(default)} '
+                         f'if {variables[name]} is None '
+                         f'else {value(name)})')
+    items = ''.join(part + ', ' for part in parts)
+    lines.append(f'    return {empty!r}.join(({items}))')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_function(segments: tuple, keys: tuple, required_keys: tuple,
+                      fail_on_unresolved: bool, empty: AnyStr,
+                      encoder: Optional[Callable[[Mapping[str, Any]],
+                                                 Callable]] = None
+                      ) -> Callable[[Mapping[str, Optional[Any]]], AnyStr]:
+    """
+    Build a python function substituting the given segments, see
+    generate_source.
+
+    :param encoder: for bytes templates, build a lookup function encoding
+        values from the values mapping
+    """
+    source = generate_source(segments, keys, required_keys,
+                             fail_on_unresolved, empty)
+    namespace = {'KeyUnresolvedException': KeyUnresolvedException,
+                 'encoder': encoder}
+    exec(compile(source, '<varsubst template>', 'exec'), namespace)
+    return namespace['substitute']
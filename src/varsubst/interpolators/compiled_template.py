@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from itertools import repeat
+from typing import (Any, AnyStr, Callable, Iterable, Iterator, List, Mapping,
+                    NamedTuple, Optional, Sequence, Tuple, Union)
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators.codegen import generate_function
+from varsubst.resolvers import BaseResolver
+
+Variable = Tuple[str, Optional[str], Optional[tuple]]
+"""
+A variable segment is a tuple ``(name, operator, default)`` where:
+    - name is the key given to the resolver
+    - operator is None, '-' or ':-'
+    - default is None or a tuple of literal and simple variable segments
+"""
+
+Segment = Union[str, bytes, Variable]
+
+
+class VariableInfo(NamedTuple):
+    """
+    How a template references a key.
+    """
+    name: str
+    has_default: bool
+    """
+    True if every reference to the key has a default, i.e. the key is
+    optional.
+    """
+    default_keys: Tuple[str, ...]
+    """
+    Keys referenced inside the defaults of the key.
+    """
+
+
+class CompiledTemplate:
+    """
+    A shell-like template parsed once and rendered many times.
+
+    The template is kept as a list of segments which are either literal
+    strings or variables. Rendering only resolves variables and joins the
+    result.
+
+    Templates parsed from bytes have bytes literals. Their resolved values
+    are encoded, unless they already are bytes.
+    """
+
+    def __init__(self, segments: Sequence[Segment],
+                 fail_on_unresolved: bool,
+                 encoding: Optional[str] = None,
+                 errors: str = 'strict',
+                 codegen: bool = False) -> None:
+        """
+        :param segments: literals and variables produced by the parser
+        :param fail_on_unresolved: if true, will throw an exception.
+        :param encoding: if set, the template is made of bytes and resolved
+            values are encoded with this encoding
+        :param errors: error handling scheme used to encode values
+        :param codegen: if true, generate a python function substituting the
+            template instead of interpreting its segments
+        """
+        self.segments = tuple(segments)
+        self.fail_on_unresolved = fail_on_unresolved
+        self.encoding = encoding
+        self.errors = errors
+        self.empty: AnyStr = '' if encoding is None else b''
+        keys = {}
+        required_keys = {}
+        for segment in self.segments:
+            if segment.__class__ is not tuple:
+                continue
+            name, operator, default = segment
+            keys[name] = None
+            if operator is None:
+                required_keys[name] = None
+                continue
+            for default_segment in default:
+                if default_segment.__class__ is tuple:
+                    keys[default_segment[0]] = None
+                    required_keys[default_segment[0]] = None
+        self.keys: Tuple[str, ...] = tuple(keys)
+        """
+        Distinct keys needed to render the template, in order of appearance.
+        """
+        self.required_keys: Tuple[str, ...] = tuple(required_keys)
+        """
+        Distinct keys which fail the rendering when unresolved, if
+        fail_on_unresolved is set, in the order they are checked.
+        """
+        self._function: Optional[Callable] = None
+        if codegen:
+            self._function = generate_function(
+                self.segments, self.keys, self.required_keys,
+                fail_on_unresolved, self.empty,
+                None if encoding is None else self._encoder)
+
+    def variables(self) -> Tuple[VariableInfo, ...]:
+        """
+        :return: how the template references each of its keys, in order of
+            appearance
+        """
+        has_default = dict.fromkeys(self.keys, True)
+        default_keys = {key: {} for key in self.keys}
+        for segment in self.segments:
+            if segment.__class__ is not tuple:
+                continue
+            name, operator, default = segment
+            if operator is None:
+                has_default[name] = False
+                continue
+            for default_segment in default:
+                if default_segment.__class__ is tuple:
+                    has_default[default_segment[0]] = False
+                    default_keys[name][default_segment[0]] = None
+        return tuple(VariableInfo(key, has_default[key],
+                                  tuple(default_keys[key]))
+                     for key in self.keys)
+
+    def _resolve(self, name: str,
+                 resolve: Callable[[str], Optional[AnyStr]]) -> AnyStr:
+        result = resolve(name)
+        if result is None and self.fail_on_unresolved:
+            raise KeyUnresolvedException(name)
+        return result or self.empty
+
+    def _render_default(self, default: tuple,
+                        resolve: Callable[[str], Optional[AnyStr]]
+                        ) -> AnyStr:
+        return self.empty.join([
+            segment if segment.__class__ is not tuple
+            else self._resolve(segment[0], resolve)
+            for segment in default])
+
+    def _encoder(self, values: Mapping[str, Optional[Any]]
+                 ) -> Callable[[str], Optional[bytes]]:
+        get = values.get
+        encoding = self.encoding
+        errors = self.errors
+
+        def resolve(key: str) -> Optional[bytes]:
+            value = get(key)
+            if value is None or value.__class__ is bytes:
+                return value
+            return str(value).encode(encoding, errors)
+
+        return resolve
+
+    def render(self, resolver: BaseResolver) -> AnyStr:
+        """
+        Resolve all keys of the template in one batch, then substitute them.
+
+        :param resolver: an instance which return a value given a key
+        :return: The template with variables replaced with their values
+        """
+        return self.substitute(resolver.resolve_many(self.keys))
+
+    def substitute(self, values: Mapping[str, Optional[Any]]) -> AnyStr:
+        """
+        :param values: values of the keys, a missing key being unresolved
+        :return: The template with variables replaced with their values
+        """
+        if self._function is not None:
+            return self._function(values)
+        return self.empty.join(self.substitute_segments(values))
+
+    def substitute_segments(self, values: Mapping[str, Optional[Any]],
+                            indexes: Optional[Iterable[int]] = None
+                            ) -> List[AnyStr]:
+        """
+        :param values: values of the keys, a missing key being unresolved
+        :param indexes: if set, only the segments at these indexes are
+            rendered
+        :return: The rendered value of each segment
+        """
+        if self.encoding is None:
+            resolve = values.get
+        else:
+            resolve = self._encoder(values)
+        segments = self.segments
+        if indexes is not None:
+            segments = [segments[index] for index in indexes]
+        parts = []
+        append = parts.append
+        for segment in segments:
+            if segment.__class__ is not tuple:
+                append(segment)
+                continue
+            name, operator, default = segment
+            if operator is None:
+                append(self._resolve(name, resolve))
+                continue
+            result = resolve(name)
+            # variables of the default are resolved even when the default
+            # is not used, as unresolved ones must fail the rendering.
+            default_value = self._render_default(default, resolve)
+            if operator == ':-':
+                # use default if var is unset or empty
+                if not result:
+                    result = default_value
+            elif result is None:
+                # use default if var is unset
+                result = default_value
+            append(result or self.empty)
+        return parts
+
+    def count_defaults(self, values: Mapping[str, Optional[Any]]) -> int:
+        """
+        :param values: values of the keys, a missing key being unresolved
+        :return: the number of variables replaced by their default
+        """
+        count = 0
+        for segment in self.segments:
+            if segment.__class__ is not tuple or segment[1] is None:
+                continue
+            value = values.get(segment[0])
+            if value is None or (segment[1] == ':-' and not value):
+                count += 1
+        return count
+
+    def substitute_rows(self, rows: Iterable[Mapping[str, Optional[Any]]]
+                        ) -> Iterator[AnyStr]:
+        """
+        :param rows: values of the keys for each rendering
+        :return: an iterator over the rendered template of each row
+        """
+        if self.encoding is not None:
+            return map(self.substitute, rows)
+        keys = self.keys
+        substitute = self.substitute
+
+        def substitute_row(row: Mapping[str, Optional[Any]]) -> str:
+            get = row.get
+            values = {}
+            for key in keys:
+                value = get(key)
+                values[key] = value if value is None or \
+                    value.__class__ is str else str(value)
+            return substitute(values)
+
+        return map(substitute_row, rows)
+
+    def _column(self, key: str, columns: Mapping[str, Sequence[Any]],
+                count: int) -> list:
+        column = columns.get(key)
+        if column is None:
+            return [None] * count
+        if self.encoding is None:
+            return [value if value is None or value.__class__ is str
+                    else str(value) for value in column]
+        encoding = self.encoding
+        errors = self.errors
+        return [value if value is None or value.__class__ is bytes
+                else str(value).encode(encoding, errors)
+                for value in column]
+
+    def substitute_columns(self, columns: Mapping[str, Sequence[Any]]
+                           ) -> Iterator[AnyStr]:
+        """
+        Render the template once per row of columns, segment by segment
+        rather than row by row.
+
+        :param columns: sequences of values, the n-th value of each sequence
+            being used to render the n-th template. A missing column is
+            unresolved.
+        :return: an iterator over the rendered template of each row
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("columns must have the same length")
+        count = lengths.pop() if lengths else 0
+        empty = self.empty
+        resolved = {key: self._column(key, columns, count)
+                    for key in self.keys}
+        if self.fail_on_unresolved:
+            for key in self.required_keys:
+                if any(value is None for value in resolved[key]):
+                    raise KeyUnresolvedException(key)
+
+        def values(name: str) -> list:
+            return [value or empty for value in resolved[name]]
+
+        def defaults(default: tuple) -> list:
+            parts = [repeat(segment, count) if segment.__class__ is not tuple
+                     else values(segment[0])
+                     for segment in default]
+            return [empty.join(row) for row in zip(*parts)]
+
+        parts = []
+        for segment in self.segments:
+            if segment.__class__ is not tuple:
+                parts.append(repeat(segment, count))
+                continue
+            name, operator, default = segment
+            if operator is None:
+                parts.append(values(name))
+            elif operator == ':-':
+                parts.append([value or default_value for value, default_value
+                              in zip(resolved[name], defaults(default))])
+            else:
+                parts.append([default_value if value is None
+                              else value or empty
+                              for value, default_value
+                              in zip(resolved[name], defaults(default))])
+        if not parts:
+            return repeat(empty, count)
+        return map(empty.join, zip(*parts))
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.segments!r})"
@@ -22,20 +22,197 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from jinja2 import Environment
+from collections import ChainMap
+from threading import Lock
+from time import perf_counter
+from typing import IO, FrozenSet, Optional, Tuple, Union
 
+from jinja2 import Environment, Template, meta
+from jinja2.runtime import Context
+
+from varsubst.cache import CacheInfo, LRUCache
 from varsubst.interpolators.base_interpolator import BaseInterpolator
-from varsubst.resolvers import BaseResolver
+from varsubst.observers import RecordingResolver, RenderStats
+from varsubst.resolvers import (AsyncBaseResolver, BaseResolver,
+                                ResolverMapping, aresolve_many)
 
 
 class JinjaInterpolator(BaseInterpolator):
 
-    def __init__(self, environment: Environment = Environment()) -> None:
+    def __init__(self, environment: Environment = Environment(),
+                 cache_size: Optional[int] = 128) -> None:
+        """
+        :param environment: jinja environment used to compile templates
+        :param cache_size: number of compiled templates to keep, the least
+            recently used ones being evicted. None or 0 disables the cache.
+        """
         self.environment = environment
+        self._cache = LRUCache(cache_size) if cache_size else None
+        self._lock = Lock()
+        self._environment_state = self._snapshot_environment()
+
+    def __reduce__(self):
+        cache_size = None if self._cache is None else self._cache.maxsize
+        return JinjaInterpolator, (self.environment, cache_size)
+
+    def _snapshot_environment(self) -> tuple:
+        environment = self.environment
+        return tuple((mapping, len(mapping)) for mapping in (
+            environment.filters, environment.tests, environment.globals))
+
+    def _environment_changed(self) -> bool:
+        # a cheap check on the hot path: entries added, removed, or mappings
+        # replaced. Replacing an entry in place requires cache_clear().
+        environment = self.environment
+        current = (environment.filters, environment.tests,
+                   environment.globals)
+        for mapping, (snapshot, size) in zip(current,
+                                             self._environment_state):
+            if mapping is not snapshot or len(mapping) != size:
+                return True
+        return False
+
+    def _compile(self, template: str) -> Tuple[Template, FrozenSet[str]]:
+        """
+        :return: the compiled template and the variables it looks up
+        """
+        ast = self.environment.parse(template)
+        keys = frozenset(meta.find_undeclared_variables(ast))
+        return self.environment.from_string(ast), keys
+
+    def _cached_template(self, template: str
+                         ) -> Optional[Tuple[Template, FrozenSet[str]]]:
+        if self._cache is None:
+            return None
+        if self._environment_changed():
+            # templates compiled against previous filters, tests or globals
+            # are dropped.
+            with self._lock:
+                if self._environment_changed():
+                    self._cache.clear()
+                    self._environment_state = self._snapshot_environment()
+        return self._cache.get(template)
+
+    def _get_template(self,
+                      template: str) -> Tuple[Template, FrozenSet[str]]:
+        compiled = self._cached_template(template)
+        if compiled is None:
+            compiled = self._compile(template)
+            if self._cache is not None:
+                self._cache.put(template, compiled)
+        return compiled
+
+    def _new_context(self, jtemplate: Template, keys: FrozenSet[str],
+                     resolver: BaseResolver) -> Context:
+        # a shared context uses the given mapping as is, globals must then
+        # be chained after the resolved values.
+        return jtemplate.new_context(
+            ChainMap(ResolverMapping(resolver, resolver.resolve_many(keys)),
+                     jtemplate.globals),
+            shared=True)
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        """
+        :return: statistics of the compiled templates cache, None if disabled
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def cache_clear(self) -> None:
+        """
+        Remove all compiled templates from the cache. Required if an entry
+        of the filters, tests or globals of the environment is replaced, or
+        if the environment is changed otherwise.
+        """
+        if self._cache is not None:
+            self._cache.clear()
 
     def render(self, template: str, resolver: BaseResolver) -> str:
         """
         Substitute template using jinja.
+
+        Variables used by the template are resolved in one batch. Any other
+        variable, e.g. looked up by an included template, is resolved when
+        needed. The cost of rendering doesn't depend on the number of values
+        provided by the resolver.
+        """
+        if self._observers:
+            return self._render_observed(template, resolver)
+        jtemplate, keys = self._get_template(template)
+        return self._render_template(jtemplate, keys, resolver)
+
+    def _render_template(self, jtemplate: Template, keys: FrozenSet[str],
+                         resolver: BaseResolver) -> str:
+        if self.environment.is_async:
+            return jtemplate.render(resolver.values())
+        context = self._new_context(jtemplate, keys, resolver)
+        try:
+            return self.environment.concat(jtemplate.root_render_func(context))
+        except Exception:
+            self.environment.handle_exception()
+
+    def _render_observed(self, template: str, resolver: BaseResolver) -> str:
+        start = perf_counter()
+        compiled = self._cached_template(template)
+        cache_hit = compiled is not None
+        parse_time = 0.0
+        if compiled is None:
+            compiled = self._compile(template)
+            parse_time = perf_counter() - start
+            if self._cache is not None:
+                self._cache.put(template, compiled)
+        jtemplate, keys = compiled
+        recording = RecordingResolver(resolver)
+        result = None
+        try:
+            result = self._render_template(jtemplate, keys, recording)
+            return result
+        finally:
+            # defaults are jinja filters, which are not observed.
+            self._notify(RenderStats(
+                parse_time, perf_counter() - start, recording.calls,
+                len(keys), cache_hit, None, tuple(recording.unresolved),
+                0 if result is None else len(result)))
+
+    def render_stream(self, reader: IO[str], writer: IO[str],
+                      resolver: BaseResolver,
+                      chunk_size: int = 65536) -> None:
+        """
+        Substitute template using jinja, writing rendered parts as soon as
+        they are produced. Jinja needs the whole template, so reader is read
+        entirely and chunk_size is ignored.
+        """
+        jtemplate, keys = self._get_template(reader.read())
+        if self.environment.is_async:
+            writer.write(jtemplate.render(resolver.values()))
+            return
+        context = self._new_context(jtemplate, keys, resolver)
+        try:
+            for part in jtemplate.root_render_func(context):
+                writer.write(part)
+        except Exception:
+            self.environment.handle_exception()
+
+    async def arender(self, template: str,
+                      resolver: Union[BaseResolver, AsyncBaseResolver],
+                      concurrency: Optional[int] = None) -> str:
+        """
+        Resolve the variables used by the template concurrently, then
+        substitute template using jinja.
+
+        With an asynchronous resolver, only variables used by the template
+        itself are available, not the ones of included templates.
+
+        :param concurrency: if set, maximum number of keys being resolved at
+            the same time by an asynchronous resolver
         """
-        jtemplate = self.environment.from_string(template)
-        return jtemplate.render(**resolver.values())
+        if not isinstance(resolver, AsyncBaseResolver):
+            return self.render(template, resolver)
+        jtemplate, keys = self._get_template(template)
+        resolved = await aresolve_many(resolver, keys, concurrency)
+        values = {key: value for key, value in resolved.items()
+                  if value is not None}
+        if self.environment.is_async:
+            return await jtemplate.render_async(values)
+        return jtemplate.render(values)
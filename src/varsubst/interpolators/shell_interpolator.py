@@ -22,81 +22,307 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import mmap
+import os
 import re
-from typing import AnyStr, Pattern
+from time import perf_counter
+from typing import (IO, TYPE_CHECKING, Any, AnyStr, Container, Dict, Iterable,
+                    Iterator, List, Mapping, Match, Optional, Pattern,
+                    Sequence, Tuple, Union)
 
-from varsubst.exceptions import KeyUnresolvedException
+from varsubst.cache import CacheInfo, LRUCache
+from varsubst.exceptions import KeysUnresolvedException
 from varsubst.interpolators.base_interpolator import BaseInterpolator
-from varsubst.resolvers import BaseResolver
+from varsubst.interpolators.check_report import CheckReport, UnresolvedLocation
+from varsubst.interpolators.compiled_template import (CompiledTemplate,
+                                                      Segment, Variable,
+                                                      VariableInfo)
+from varsubst.interpolators.shell_scanner import scan, unfinished_start
+from varsubst.observers import RecordingResolver, RenderStats
+from varsubst.resolvers import AsyncBaseResolver, BaseResolver, aresolve_many
+
+if TYPE_CHECKING:
+    from varsubst.disk_cache import DiskCache
+
+
+def _name(name: AnyStr) -> str:
+    """
+    Names and operators parsed from bytes are given to resolvers as str.
+    """
+    if isinstance(name, bytes):
+        return name.decode('ascii')
+    return name
 
 
 class ShellInterpolator(BaseInterpolator):
 
     _simple_re: Pattern[AnyStr] = re.compile(r'(?<!\\)\$([A-Za-z0-9_]+)')
+    _simple_bytes_re: Pattern[AnyStr] = re.compile(
+        _simple_re.pattern.encode('ascii'))
     """
-    For a given string, will match ${anystring1:-anystring2} or
-    ${anystring1-anystring2}
+    For a given string, will match $anystring1, ${anystring1},
+    ${anystring1:-anystring2} or ${anystring1-anystring2}
 
     Groups extracted are :
-        1. anystring1
-        2. :-anystring2 or -anystring2
+        1. anystring1 of $anystring1
+        2. anystring1 of the bracketed forms
         3. :- or -
         4. anystring2
     """
-    _extended_re: Pattern[AnyStr] = re.compile(
-        r'(?<!\\)\$\{([A-Za-z0-9_]+)((:?-)([^}]+))?\}')
+    _expression_re: Pattern[AnyStr] = re.compile(
+        r'(?<!\\)\$(?:([A-Za-z0-9_]+)|\{([A-Za-z0-9_]+)(?:(:?-)([^}]+))?\})')
+    _expression_bytes_re: Pattern[AnyStr] = re.compile(
+        _expression_re.pattern.encode('ascii'))
 
-    def __init__(self, fail_on_unresolved: bool) -> None:
+    engines = ('regex', 'scanner')
+    """
+    Available parsers:
+        - regex: one regular expression matching every variable form
+        - scanner: single left to right pass over the template, jumping
+          from one '$' to the next one. It is only faster on templates with
+          few '$'.
+    """
+
+    def __init__(self, fail_on_unresolved: bool,
+                 engine: str = 'regex',
+                 cache_size: Optional[int] = None,
+                 encoding: str = 'utf-8',
+                 errors: str = 'strict',
+                 codegen: bool = False,
+                 disk_cache: Optional['DiskCache'] = None) -> None:
         """
         :param fail_on_unresolved: if true, will throw an exception.
+        :param engine: parser used to compile templates, one of engines.
+            Bytes templates are always parsed with the regex engine.
+        :param cache_size: if set, keep up to cache_size compiled templates,
+            evicting the least recently used ones.
+        :param encoding: encoding of values substituted in bytes templates
+        :param errors: error handling scheme used to encode values
+        :param codegen: if true, compiled templates are turned into python
+            functions, which is worth it for templates rendered many times.
+            It is best used with a cache.
+        :param disk_cache: if set, parsed templates are kept in this cache,
+            shared by processes and across runs. It is looked up when a
+            template is not in the cache of cache_size templates.
         """
+        if engine not in ShellInterpolator.engines:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of "
+                             f"{', '.join(ShellInterpolator.engines)}")
         self.fail_on_unresolved = fail_on_unresolved
+        self.engine = engine
+        self.encoding = encoding
+        self.errors = errors
+        self.codegen = codegen
+        self._cache = LRUCache(cache_size) if cache_size else None
+        self.disk_cache = disk_cache
+
+    @classmethod
+    def _parse_default_regex(cls, default: AnyStr) -> tuple:
+        """
+        Split a default value into literals and simple variables.
+        """
+        if isinstance(default, bytes):
+            simple_re = cls._simple_bytes_re
+        else:
+            simple_re = cls._simple_re
+        segments: List[Segment] = []
+        position = 0
+        for m in simple_re.finditer(default):
+            if m.start() > position:
+                segments.append(default[position:m.start()])
+            segments.append((_name(m.group(1)), None, None))
+            position = m.end()
+        if position < len(default):
+            segments.append(default[position:])
+        return tuple(segments)
+
+    @classmethod
+    def _variable_regex(cls, m: Match) -> Variable:
+        """
+        Build the variable segment of a match of _expression_re.
+        """
+        simple_name, name, operator, default = m.groups()
+        if simple_name is not None:
+            return (_name(simple_name), None, None)
+        elif operator is not None:
+            return (_name(name), _name(operator),
+                    cls._parse_default_regex(default))
+        else:
+            return (_name(name), None, None)
+
+    @classmethod
+    def _parse_regex(cls, template: AnyStr) -> List[Segment]:
+        """
+        Split a template into literals and variables.
+        """
+        if isinstance(template, bytes):
+            expression_re = cls._expression_bytes_re
+        else:
+            expression_re = cls._expression_re
+        segments: List[Segment] = []
+        position = 0
+        for m in expression_re.finditer(template):
+            if m.start() > position:
+                segments.append(template[position:m.start()])
+            segments.append(cls._variable_regex(m))
+            position = m.end()
+        if position < len(template):
+            segments.append(template[position:])
+        return segments
+
+    def _parse(self, template: AnyStr) -> List[Segment]:
+        if self.engine == 'scanner' and not isinstance(template, bytes):
+            return scan(template)
+        return self._parse_regex(template)
+
+    def _compile(self, template: AnyStr, codegen: bool = False,
+                 segments: Optional[Sequence[Segment]] = None
+                 ) -> CompiledTemplate:
+        if segments is None:
+            segments = self._parse(template)
+        if isinstance(template, bytes):
+            return CompiledTemplate(segments, self.fail_on_unresolved,
+                                    self.encoding, self.errors, codegen)
+        return CompiledTemplate(segments, self.fail_on_unresolved,
+                                codegen=codegen)
+
+    def _compile_persistent(self, template: AnyStr) -> CompiledTemplate:
+        """
+        Compile the template with the segments of the disk cache, if any.
+        """
+        if self.disk_cache is None:
+            return self._compile(template, self.codegen)
+        segments = self.disk_cache.get(template)
+        if segments is None:
+            segments = tuple(self._parse(template))
+            self.disk_cache.put(template, segments)
+        return self._compile(template, self.codegen, segments)
+
+    def compile(self, template: AnyStr) -> CompiledTemplate:
+        """
+        Parse the template once so that it can be rendered many times.
+
+        :param template: A string or bytes possibly containing shell-like
+            variables
+        :return: A compiled template bound to this interpolator settings
+        """
+        if self._cache is None:
+            return self._compile_persistent(template)
+        compiled = self._cache.get(template)
+        if compiled is None:
+            compiled = self._compile_persistent(template)
+            self._cache.put(template, compiled)
+        return compiled
+
+    def variables(self, template: AnyStr) -> Tuple[VariableInfo, ...]:
+        """
+        List the keys referenced by the template without rendering it.
+
+        :param template: A string or bytes possibly containing shell-like
+            variables
+        :return: how the template references each of its keys, in order of
+            appearance
+        """
+        return self.compile(template).variables()
+
+    def analyze(self, templates: Iterable[AnyStr]
+                ) -> List[Tuple[VariableInfo, ...]]:
+        """
+        List the keys referenced by each template without rendering them.
+        Templates are compiled through the cache, if any, so that they are
+        not parsed again when rendered.
+
+        :return: the variables of each template, in the order of templates
+        """
+        return [self.compile(template).variables() for template in templates]
+
+    def _locate(self, template: AnyStr, source: str,
+                unresolved: Container[str]) -> Iterator[UnresolvedLocation]:
+        """
+        Find the references to unresolved keys by parsing the template
+        again, keeping the position of each variable.
+        """
+        if isinstance(template, bytes):
+            expression_re = ShellInterpolator._expression_bytes_re
+            simple_re = ShellInterpolator._simple_bytes_re
+            newline = b'\n'
+        else:
+            expression_re = ShellInterpolator._expression_re
+            simple_re = ShellInterpolator._simple_re
+            newline = '\n'
+        references = []
+        for m in expression_re.finditer(template):
+            name, operator, _ = self._variable_regex(m)
+            if operator is None:
+                references.append((name, m.start()))
+                continue
+            # variables of defaults are required as well.
+            for default_m in simple_re.finditer(template, m.start(4),
+                                                m.end(4)):
+                references.append((_name(default_m.group(1)),
+                                   default_m.start()))
+        for name, offset in references:
+            if name in unresolved:
+                line_start = template.rfind(newline, 0, offset) + 1
+                yield UnresolvedLocation(
+                    name, source, offset,
+                    template.count(newline, 0, offset) + 1,
+                    offset - line_start + 1)
+
+    def check(self, templates: Union[AnyStr, Iterable[AnyStr],
+                                     Mapping[str, AnyStr]],
+              resolver: BaseResolver) -> CheckReport:
+        """
+        Check that every required key of the templates is resolved, without
+        rendering them. Keys are resolved once for all templates. Only the
+        templates referencing unresolved keys are parsed again to locate
+        them.
+
+        :param templates: a template, templates, or a mapping of templates
+            by source, e.g. by path
+        :return: the unresolved keys and the location of their references.
+            Without source, templates are named after their index.
+        """
+        if isinstance(templates, (str, bytes)):
+            templates = [templates]
+        if isinstance(templates, Mapping):
+            named = list(templates.items())
+        else:
+            named = [(f"template #{index}", template)
+                     for index, template in enumerate(templates)]
+        compiled = [self.compile(template) for _, template in named]
+        keys: Dict[str, None] = {}
+        for template in compiled:
+            keys.update(dict.fromkeys(template.required_keys))
+        values = resolver.resolve_many(keys)
+        unresolved = {key for key in keys if values.get(key) is None}
+        locations = []
+        if unresolved:
+            for (source, template), compiled_template in zip(named, compiled):
+                if not unresolved.isdisjoint(compiled_template.required_keys):
+                    locations.extend(
+                        self._locate(template, source, unresolved))
+        return CheckReport(
+            len(named),
+            tuple(dict.fromkeys(location.key for location in locations)),
+            tuple(locations))
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        """
+        :return: statistics of the compiled templates cache, None if disabled
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
 
-    def _repl_simple_env_var(self, resolver: BaseResolver) -> str:
-        """
-        :param resolver: an instance which return a value given a key
-        """
-        def substitute(m):
-            var_name = m.group(1)
-            result = resolver.resolve(var_name)
-            if result is None and self.fail_on_unresolved:
-                raise KeyUnresolvedException(var_name)
-            return result or ''
-
-        return substitute
-
-    def _repl_extended_env_var(self, resolver: BaseResolver) -> str:
-        """
-        :param resolver: an instance which return a value given a key
-        """
-        def substitute(m):
-            var_name = m.group(1)
-            result = resolver.resolve(var_name)
-            default_spec = m.group(2)
-            if default_spec:
-                default_raw = m.group(4)
-                if m.group(3) == ':-':
-                    # use default if var is unset or empty
-                    if not result:
-                        result = ShellInterpolator._simple_re.sub(
-                            self._repl_simple_env_var(resolver),
-                            default_raw)
-                elif m.group(3) == '-':
-                    # use default if var is unset
-                    if result is None:
-                        result = ShellInterpolator._simple_re.sub(
-                            self._repl_simple_env_var(resolver),
-                            default_raw)
-                else:
-                    raise RuntimeError('Unexpected string matched regex')
-            else:
-                if result is None and self.fail_on_unresolved:
-                    raise KeyUnresolvedException(var_name)
-            return result or ''
-
-        return substitute
-
-    def render(self, template: str, resolver: BaseResolver) -> str:
+    def cache_clear(self) -> None:
+        """
+        Remove all compiled templates from the cache.
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
+    def render(self, template: AnyStr, resolver: BaseResolver) -> AnyStr:
         """
         Substitute shell like variables in the given template
         The following forms are supported:
@@ -110,14 +336,179 @@ class ShellInterpolator(BaseInterpolator):
         ${FOO-somestring}
             uses "somestring" only if $FOO is unset
         :param str string: A string possibly containing environment variables
+            Bytes templates give bytes, values being encoded with encoding.
         :return: The string with env variable specs replaced with their values
         """
-        # handle simple un-bracketed env vars like $FOO
-        first_pass = ShellInterpolator._simple_re.sub(
-            self._repl_simple_env_var(resolver),
-            template)
+        if self._observers:
+            return self._render_observed(template, resolver)
+        return self.compile(template).render(resolver)
 
-        # handle bracketed env vars with optional default specification
-        return ShellInterpolator._extended_re.sub(
-            self._repl_extended_env_var(resolver),
-            first_pass)
+    def _render_observed(self, template: AnyStr,
+                         resolver: BaseResolver) -> AnyStr:
+        start = perf_counter()
+        compiled = None if self._cache is None else self._cache.get(template)
+        cache_hit = compiled is not None
+        parse_time = 0.0
+        if compiled is None:
+            compiled = self._compile_persistent(template)
+            parse_time = perf_counter() - start
+            if self._cache is not None:
+                self._cache.put(template, compiled)
+        recording = RecordingResolver(resolver)
+        values: Mapping[str, Optional[Any]] = {}
+        result = None
+        try:
+            values = recording.resolve_many(compiled.keys)
+            result = compiled.substitute(values)
+            return result
+        finally:
+            self._notify(RenderStats(
+                parse_time, perf_counter() - start, recording.calls,
+                len(compiled.keys), cache_hit,
+                compiled.count_defaults(values),
+                tuple(recording.unresolved),
+                0 if result is None else len(result)))
+
+    def render_many(self, templates: Iterable[AnyStr],
+                    resolver: BaseResolver) -> List[AnyStr]:
+        """
+        Render several templates with the union of their keys resolved in a
+        single batch.
+
+        :return: rendered templates, in the order of templates
+        :raise KeysUnresolvedException: with all the keys which have not been
+            resolved, if fail_on_unresolved is set
+        """
+        compiled = [self.compile(template) for template in templates]
+        keys: Dict[str, None] = {}
+        for template in compiled:
+            keys.update(dict.fromkeys(template.keys))
+        values = resolver.resolve_many(keys)
+        if self.fail_on_unresolved:
+            unresolved: Dict[str, None] = {}
+            for template in compiled:
+                for key in template.required_keys:
+                    if values.get(key) is None:
+                        unresolved[key] = None
+            if unresolved:
+                raise KeysUnresolvedException(unresolved)
+        return [template.substitute(values) for template in compiled]
+
+    def render_rows(self, template: AnyStr,
+                    rows: Union[Iterable[Mapping[str, Any]],
+                                Mapping[str, Sequence[Any]]]
+                    ) -> Iterator[AnyStr]:
+        """
+        Render one template against many records, parsing it only once.
+
+        :param rows: either an iterable of mappings, one per record, or a
+            mapping of columns, i.e. sequences of values of the same length.
+            Columns are rendered segment by segment for all records at once.
+        :return: an iterator over the rendered template of each record. With
+            rows, records are rendered while iterating.
+        """
+        compiled = self.compile(template)
+        if isinstance(rows, Mapping):
+            return compiled.substitute_columns(rows)
+        return compiled.substitute_rows(rows)
+
+    def render_file(self, path: str, out_path: str,
+                    resolver: BaseResolver) -> None:
+        """
+        Render the file at path into out_path.
+
+        The input file is memory-mapped and variables are looked up in
+        place. Only the variables are rendered, the text between them is
+        written straight from the mapping, so files with few variables cost
+        little more than copying them.
+
+        :param path: path of the template
+        :param out_path: path of the rendered file, which may be path
+        """
+        if os.path.exists(out_path) and os.path.samefile(path, out_path):
+            # the template is mapped while rendered: truncating it would
+            # crash the reads, so it is rendered aside and then replaced
+            import shutil
+            import tempfile
+            target = os.path.realpath(out_path)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target),
+                                            suffix='.tmp')
+            os.close(fd)
+            try:
+                self._render_mapped(path, tmp_path, resolver)
+                shutil.copymode(path, tmp_path)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return
+        self._render_mapped(path, out_path, resolver)
+
+    def _render_mapped(self, path: str, out_path: str,
+                       resolver: BaseResolver) -> None:
+        with open(path, 'rb') as reader:
+            if os.fstat(reader.fileno()).st_size == 0:
+                open(out_path, 'wb').close()
+                return
+            with mmap.mmap(reader.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                spans = []
+                variables = []
+                for m in ShellInterpolator._expression_bytes_re.finditer(
+                        data):
+                    spans.append(m.span())
+                    variables.append(self._variable_regex(m))
+                compiled = CompiledTemplate(variables,
+                                            self.fail_on_unresolved,
+                                            self.encoding, self.errors)
+                parts = compiled.substitute_segments(
+                    resolver.resolve_many(compiled.keys))
+                with memoryview(data) as view, \
+                        open(out_path, 'wb') as writer:
+                    position = 0
+                    for (start, end), part in zip(spans, parts):
+                        writer.write(view[position:start])
+                        writer.write(part)
+                        position = end
+                    writer.write(view[position:])
+
+    def render_stream(self, reader: IO[str], writer: IO[str],
+                      resolver: BaseResolver,
+                      chunk_size: int = 65536) -> None:
+        """
+        Substitute shell like variables while reading the template by chunks.
+
+        Text is written as soon as no variable may continue in the next
+        chunk, so memory stays bounded by the chunk size and the longest
+        variable expression.
+
+        :param reader: file-like object providing the template
+        :param writer: file-like object receiving the rendered template
+        :param chunk_size: number of characters read at once
+        """
+        pending = ''
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            text = pending + chunk
+            position = unfinished_start(text)
+            if position:
+                writer.write(self._compile(text[:position]).render(resolver))
+            pending = text[position:]
+        if pending:
+            writer.write(self._compile(pending).render(resolver))
+
+    async def arender(self, template: str,
+                      resolver: Union[BaseResolver, AsyncBaseResolver],
+                      concurrency: Optional[int] = None) -> str:
+        """
+        Resolve all distinct keys of the template concurrently, then
+        substitute them.
+
+        :param concurrency: if set, maximum number of keys being resolved at
+            the same time by an asynchronous resolver
+        """
+        compiled = self.compile(template)
+        values = await aresolve_many(resolver, compiled.keys, concurrency)
+        return compiled.substitute(values)
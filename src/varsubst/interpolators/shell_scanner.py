@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+from typing import AnyStr, List, Pattern
+
+from varsubst.interpolators.compiled_template import Segment
+
+_name_re: Pattern[AnyStr] = re.compile(r'[A-Za-z0-9_]+')
+
+"""
+Match a variable which may continue after the end of the string, i.e.
+$, $FOO, ${, ${FOO, ${FOO:, ${FOO- or ${FOO:-default without the closing
+bracket.
+"""
+_unfinished_re: Pattern[AnyStr] = re.compile(
+    r'(?<!\\)\$(?:[A-Za-z0-9_]*|\{[A-Za-z0-9_]*'
+    r'|\{[A-Za-z0-9_]+(?::|:?-[^}]*))\Z')
+
+
+def _scan_default(default: str) -> tuple:
+    """
+    Split a default value into literals and simple variables.
+    """
+    segments: List[Segment] = []
+    find = default.find
+    match_name = _name_re.match
+    literal_start = 0
+    position = find('$')
+    while position != -1:
+        if position and default[position - 1] == '\\':
+            position = find('$', position + 1)
+            continue
+        m = match_name(default, position + 1)
+        if m is None:
+            position = find('$', position + 1)
+            continue
+        if position > literal_start:
+            segments.append(default[literal_start:position])
+        segments.append((m.group(), None, None))
+        literal_start = m.end()
+        position = find('$', literal_start)
+    if literal_start < len(default):
+        segments.append(default[literal_start:])
+    return tuple(segments)
+
+
+def scan(template: str) -> List[Segment]:
+    """
+    Split a template into literals and variables in a single left to right
+    pass.
+
+    The scanner jumps from one '$' to the next one. A '$' preceded by a
+    backslash is kept as is, like anything which is not one of the forms
+    below:
+        - $FOO
+        - ${FOO}
+        - ${FOO-default} or ${FOO:-default}, where default is not empty and
+          may contain simple variables like $BAR
+    """
+    segments: List[Segment] = []
+    find = template.find
+    match_name = _name_re.match
+    length = len(template)
+    literal_start = 0
+    position = find('$')
+    while position != -1:
+        if position and template[position - 1] == '\\':
+            position = find('$', position + 1)
+            continue
+        start = position + 1
+        m = match_name(template, start)
+        if m is not None:
+            segment = (m.group(), None, None)
+            end = m.end()
+        elif start < length and template[start] == '{':
+            segment = None
+            m = match_name(template, start + 1)
+            if m is not None:
+                end = m.end()
+                following = template[end:end + 2]
+                if following[:1] == '}':
+                    segment = (m.group(), None, None)
+                    end += 1
+                else:
+                    if following == ':-':
+                        operator = ':-'
+                    elif following[:1] == '-':
+                        operator = '-'
+                    else:
+                        operator = None
+                    if operator is not None:
+                        default_start = end + len(operator)
+                        close = find('}', default_start)
+                        if close > default_start:
+                            segment = (
+                                m.group(), operator,
+                                _scan_default(template[default_start:close]))
+                            end = close + 1
+        else:
+            segment = None
+        if segment is None:
+            position = find('$', start)
+            continue
+        if position > literal_start:
+            segments.append(template[literal_start:position])
+        segments.append(segment)
+        literal_start = end
+        position = find('$', end)
+    if literal_start < length:
+        segments.append(template[literal_start:])
+    return segments
+
+
+def unfinished_start(text: str) -> int:
+    """
+    Find where a variable possibly continued by following text starts.
+
+    Everything before the returned position may be rendered without knowing
+    the following text. A trailing backslash is kept with the unfinished
+    part as it escapes a '$' which may follow.
+
+    :return: the position of the unfinished part, len(text) if there is none
+    """
+    m = _unfinished_re.search(text, text.rfind('}') + 1)
+    position = len(text) if m is None else m.start()
+    if position and text[position - 1] == '\\':
+        position -= 1
+    return position
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from collections import ChainMap
+from typing import (AbstractSet, Any, AnyStr, Dict, Iterable, Iterator, List,
+                    Mapping, Optional, Set, Tuple)
+
+from varsubst.interpolators.compiled_template import CompiledTemplate
+from varsubst.interpolators.shell_interpolator import ShellInterpolator
+from varsubst.resolvers import BaseResolver
+
+
+class RenderedTemplate:
+    """
+    A compiled template with the rendered value of each of its segments.
+
+    Each key is mapped to the segments depending on it, so that a change of
+    some keys only renders again the segments using them.
+    """
+
+    def __init__(self, compiled: CompiledTemplate,
+                 values: Mapping[str, Optional[Any]]) -> None:
+        """
+        :param compiled: the template to render
+        :param values: values of the keys, a missing key being unresolved
+        """
+        self.compiled = compiled
+        dependencies: Dict[str, List[int]] = {}
+        for index, segment in enumerate(compiled.segments):
+            if segment.__class__ is not tuple:
+                continue
+            name, _, default = segment
+            segment_keys = {name}
+            if default is not None:
+                segment_keys.update(default_segment[0]
+                                    for default_segment in default
+                                    if default_segment.__class__ is tuple)
+            for key in segment_keys:
+                dependencies.setdefault(key, []).append(index)
+        self.dependencies: Dict[str, Tuple[int, ...]] = {
+            key: tuple(indexes) for key, indexes in dependencies.items()}
+        """
+        Indexes of the segments depending on each key.
+        """
+        self.parts: List[AnyStr] = compiled.substitute_segments(values)
+        self.text: AnyStr = compiled.empty.join(self.parts)
+
+    @property
+    def keys(self) -> AbstractSet[str]:
+        """
+        :return: the keys the template depends on
+        """
+        return self.dependencies.keys()
+
+    def patch(self, values: Mapping[str, Optional[Any]],
+              changed_keys: Iterable[str]) -> List[Tuple[int, AnyStr]]:
+        """
+        Render again the segments depending on changed keys, without
+        changing the template.
+
+        :param values: values of the keys, at least the ones of the segments
+            depending on changed keys
+        :param changed_keys: keys whose value may have changed
+        :return: the index and the new value of each segment which changed
+        """
+        indexes = sorted({index
+                          for key in changed_keys
+                          for index in self.dependencies.get(key, ())})
+        if not indexes:
+            return []
+        new_parts = self.compiled.substitute_segments(values, indexes)
+        parts = self.parts
+        return [(index, part) for index, part in zip(indexes, new_parts)
+                if parts[index] != part]
+
+    def apply(self, patch: List[Tuple[int, AnyStr]]) -> bool:
+        """
+        :param patch: segments to replace, as returned by patch()
+        :return: True if the rendered text changed
+        """
+        if not patch:
+            return False
+        parts = self.parts
+        for index, part in patch:
+            parts[index] = part
+        self.text = self.compiled.empty.join(parts)
+        return True
+
+    def update(self, values: Mapping[str, Optional[Any]],
+               changed_keys: Iterable[str]) -> bool:
+        """
+        Render again the segments depending on changed keys.
+
+        The template is left unchanged if rendering fails.
+
+        :param values: values of the keys, at least the ones of the segments
+            depending on changed keys
+        :param changed_keys: keys whose value may have changed
+        :return: True if the rendered text changed
+        """
+        return self.apply(self.patch(values, changed_keys))
+
+
+class TemplateSet(Mapping):
+    """
+    Named templates rendered with a resolver and kept up to date.
+
+    A reverse index maps each key to the templates depending on it. When
+    some keys change, only the templates using them are rendered again, and
+    only the affected segments of these templates.
+
+    Values of the keys are kept, so that all templates are rendered from
+    the same values until keys are updated.
+
+    The set is a read-only mapping from names to rendered templates.
+    """
+
+    def __init__(self, interpolator: ShellInterpolator,
+                 resolver: BaseResolver) -> None:
+        """
+        :param interpolator: interpolator compiling the templates
+        :param resolver: an instance which return a value given a key
+        """
+        self.interpolator = interpolator
+        self.resolver = resolver
+        self._templates: Dict[str, RenderedTemplate] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._values: Dict[str, Optional[Any]] = {}
+
+    def add(self, name: str, template: AnyStr) -> AnyStr:
+        """
+        Render a template and track its keys, replacing any template with
+        the same name.
+
+        :param name: name of the template
+        :param template: the template to render
+        :return: the rendered template
+        """
+        compiled = self.interpolator.compile(template)
+        values = self._values
+        missing_keys = [key for key in compiled.keys if key not in values]
+        if missing_keys:
+            values.update(self.resolver.resolve_many(missing_keys))
+        try:
+            rendered = RenderedTemplate(compiled, values)
+        except Exception:
+            for key in missing_keys:
+                del values[key]
+            raise
+        previous = self._templates.get(name)
+        self._templates[name] = rendered
+        for key in rendered.keys:
+            self._dependents.setdefault(key, set()).add(name)
+        if previous is not None:
+            self._untrack(name, previous.keys - rendered.keys)
+        return rendered.text
+
+    def _untrack(self, name: str, keys: Iterable[str]) -> None:
+        for key in keys:
+            names = self._dependents[key]
+            names.discard(name)
+            if not names:
+                del self._dependents[key]
+                del self._values[key]
+
+    def remove(self, name: str) -> None:
+        """
+        :param name: name of the template to forget
+        """
+        self._untrack(name, self._templates.pop(name).keys)
+
+    def dependents(self, key: str) -> AbstractSet[str]:
+        """
+        :param key: a key of the resolver
+        :return: names of the templates depending on the key
+        """
+        return frozenset(self._dependents.get(key, ()))
+
+    def update(self, changed_keys: Iterable[str]) -> Set[str]:
+        """
+        Resolve changed keys once and render again the templates using them.
+
+        If a template fails to render, no template nor value is changed.
+
+        :param changed_keys: keys whose value may have changed
+        :return: names of the templates whose rendering changed
+        """
+        changed_keys = [key for key in dict.fromkeys(changed_keys)
+                        if key in self._dependents]
+        if not changed_keys:
+            return set()
+        new_values = self.resolver.resolve_many(changed_keys)
+        values = ChainMap(new_values, self._values)
+        names = set()
+        for key in changed_keys:
+            names.update(self._dependents[key])
+        # all templates are rendered before any is changed, so that a
+        # failure leaves the values and the templates as they were.
+        patches = {name: self._templates[name].patch(values, changed_keys)
+                   for name in names}
+        self._values.update(new_values)
+        return {name for name, patch in patches.items()
+                if self._templates[name].apply(patch)}
+
+    def rendered(self, name: str) -> RenderedTemplate:
+        """
+        :param name: name of a template
+        :return: the rendered template with its dependencies
+        """
+        return self._templates[name]
+
+    def __getitem__(self, name: str) -> AnyStr:
+        return self._templates[name].text
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._templates
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._templates)
+
+    def __len__(self) -> int:
+        return len(self._templates)
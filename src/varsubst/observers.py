@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from collections import Counter, deque
+from threading import Lock
+from typing import Any, Deque, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from varsubst.resolvers import BaseResolver
+
+
+class RenderStats(NamedTuple):
+    """
+    Statistics of a single render.
+    """
+    parse_time: float
+    """
+    Seconds spent parsing the template, 0 if it was cached.
+    """
+    render_time: float
+    """
+    Seconds spent in the whole render, parsing included.
+    """
+    resolve_calls: int
+    """
+    Number of calls to resolve or resolve_many of the resolver.
+    """
+    distinct_keys: int
+    cache_hit: bool
+    """
+    True if the compiled template came from the cache of the interpolator.
+    """
+    defaults_taken: Optional[int]
+    """
+    Number of variables replaced by their default, None if unknown.
+    """
+    unresolved_keys: Tuple[str, ...]
+    output_size: int
+    """
+    Length of the rendered template, 0 if the render failed.
+    """
+
+
+class RenderObserver:
+    """
+    Base class for observers of the renders of an interpolator.
+    """
+
+    def on_render(self, stats: RenderStats) -> None:
+        """
+        Called after each render, including failed ones.
+        """
+        pass
+
+
+class RecordingResolver(BaseResolver):
+    """
+    Count the calls to another resolver during a render, and record the
+    keys it doesn't resolve.
+    """
+
+    def __init__(self, resolver: BaseResolver) -> None:
+        self.resolver = resolver
+        self.calls = 0
+        self.unresolved: Dict[str, None] = {}
+
+    def resolve(self, key: str) -> Optional[Any]:
+        self.calls += 1
+        value = self.resolver.resolve(key)
+        if value is None:
+            self.unresolved[key] = None
+        return value
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        self.calls += 1
+        values = self.resolver.resolve_many(keys)
+        for key, value in values.items():
+            if value is None:
+                self.unresolved[key] = None
+        return values
+
+    def values(self) -> Dict[str, Any]:
+        return self.resolver.values()
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """
+    Nearest-rank percentile of values in ascending order.
+    """
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+class StatsAggregator(RenderObserver):
+    """
+    Keep the statistics of the latest renders and summarize them.
+
+    Counters of renders, cache hits and unresolved keys cover all renders.
+    Percentiles cover the latest maxlen renders.
+    """
+
+    fields = ('parse_time', 'render_time', 'resolve_calls', 'distinct_keys',
+              'defaults_taken', 'output_size')
+    """
+    Numeric fields of RenderStats which are summarized.
+    """
+
+    def __init__(self, maxlen: Optional[int] = 10000) -> None:
+        """
+        :param maxlen: number of renders kept for percentiles, None keeps
+            all of them
+        """
+        self._lock = Lock()
+        self._stats: Deque[RenderStats] = deque(maxlen=maxlen)
+        self.count = 0
+        self.cache_hits = 0
+        self.unresolved: Counter = Counter()
+
+    def on_render(self, stats: RenderStats) -> None:
+        with self._lock:
+            self._stats.append(stats)
+            self.count += 1
+            self.cache_hits += stats.cache_hit
+            self.unresolved.update(stats.unresolved_keys)
+
+    def percentile(self, field: str, percent: float) -> Optional[float]:
+        """
+        :param field: one of fields
+        :param percent: between 0 and 100
+        :return: the nearest-rank percentile of field, None without renders
+        """
+        with self._lock:
+            values = sorted(value for value in
+                            (getattr(stats, field) for stats in self._stats)
+                            if value is not None)
+        if not values:
+            return None
+        return _percentile(values, percent)
+
+    def export(self, percents: Iterable[float] = (50, 90, 99)
+               ) -> Dict[str, Any]:
+        """
+        :param percents: percentiles computed for each field
+        :return: a plain dictionary of counters, and of the mean, maximum
+            and percentiles of each field
+        """
+        percents = list(percents)
+        with self._lock:
+            stats = list(self._stats)
+            result: Dict[str, Any] = {
+                'count': self.count,
+                'cache_hits': self.cache_hits,
+                'unresolved_keys': dict(self.unresolved),
+            }
+        for field in self.fields:
+            values = sorted(getattr(render, field) for render in stats
+                            if getattr(render, field) is not None)
+            if not values:
+                result[field] = {}
+                continue
+            summary = {f'p{percent:g}': _percentile(values, percent)
+                       for percent in percents}
+            summary['mean'] = sum(values) / len(values)
+            summary['max'] = values[-1]
+            result[field] = summary
+        return result
+
+    def reset(self) -> None:
+        """
+        Forget all statistics.
+        """
+        with self._lock:
+            self._stats.clear()
+            self.count = 0
+            self.cache_hits = 0
+            self.unresolved.clear()
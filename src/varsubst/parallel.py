@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from varsubst import _default_interpolator
+from varsubst.exceptions import KeysUnresolvedException, KeyUnresolvedException
+from varsubst.interpolators import BaseInterpolator, ShellInterpolator
+from varsubst.resolvers import BaseResolver, DictResolver, EnvResolver
+
+_interpolator: Optional[BaseInterpolator] = None
+_resolver: Optional[BaseResolver] = None
+
+
+def _init_worker(interpolator: BaseInterpolator,
+                 values: Dict[str, Any]) -> None:
+    """
+    Keep the interpolator and the values of the resolver for all the tasks
+    of a worker process.
+    """
+    global _interpolator, _resolver
+    _interpolator = interpolator
+    _resolver = DictResolver(values)
+
+
+def _with_source(e: KeyUnresolvedException,
+                 source: str) -> KeyUnresolvedException:
+    if isinstance(e, KeysUnresolvedException):
+        return KeysUnresolvedException(e.keys, source)
+    return KeyUnresolvedException(e.key, source)
+
+
+def _render_template(interpolator: BaseInterpolator, resolver: BaseResolver,
+                     task: tuple) -> str:
+    index, template = task
+    try:
+        return interpolator.render(template, resolver)
+    except KeyUnresolvedException as e:
+        raise _with_source(e, f"template #{index}") from None
+
+
+def _render_file(interpolator: BaseInterpolator, resolver: BaseResolver,
+                 task: tuple) -> str:
+    path, out_path = task
+    try:
+        if out_path is None:
+            with open(path) as reader:
+                return interpolator.render(reader.read(), resolver)
+        if isinstance(interpolator, ShellInterpolator):
+            interpolator.render_file(path, out_path, resolver)
+        elif os.path.exists(out_path) and os.path.samefile(path, out_path):
+            # the template is read before opening out_path truncates it
+            with open(path) as reader:
+                template = reader.read()
+            with open(out_path, 'w') as writer:
+                writer.write(interpolator.render(template, resolver))
+        else:
+            with open(path) as reader, open(out_path, 'w') as writer:
+                interpolator.render_stream(reader, writer, resolver)
+        return out_path
+    except KeyUnresolvedException as e:
+        raise _with_source(e, path) from None
+
+
+def _worker_task(function: Callable, task: tuple) -> Any:
+    return function(_interpolator, _resolver, task)
+
+
+def _run(function: Callable, tasks: List[tuple],
+         interpolator: Optional[BaseInterpolator],
+         resolver: Optional[BaseResolver], max_workers: Optional[int],
+         chunksize: int, threshold: int) -> List[Any]:
+    """
+    Run function over tasks, in worker processes if there are at least
+    threshold tasks. Values of the resolver are sent once to each worker,
+    tasks are sent by chunks and results come back in order.
+    """
+    if interpolator is None:
+        interpolator = _default_interpolator
+    if resolver is None:
+        resolver = EnvResolver()
+    if len(tasks) < threshold or max_workers == 1:
+        return [function(interpolator, resolver, task) for task in tasks]
+    values = dict(resolver.values())
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(interpolator, values)) as executor:
+        return list(executor.map(partial(_worker_task, function), tasks,
+                                 chunksize=chunksize))
+
+
+def render_templates(templates: Iterable[str], *,
+                     interpolator: Optional[BaseInterpolator] = None,
+                     resolver: Optional[BaseResolver] = None,
+                     max_workers: Optional[int] = None,
+                     chunksize: int = 64,
+                     threshold: int = 256) -> List[str]:
+    """
+    Render templates across worker processes.
+
+    :param interpolator: defaults to the interpolator of varsubst()
+    :param resolver: defaults to EnvResolver. Its values are copied once to
+        each worker.
+    :param max_workers: number of worker processes, defaults to the number
+        of processors
+    :param chunksize: number of templates sent to a worker at once
+    :param threshold: below this number of templates, render them in the
+        current process
+    :return: rendered templates, in the order of templates
+    :raise KeyUnresolvedException: with the index of the template as source
+    """
+    tasks = list(enumerate(templates))
+    return _run(_render_template, tasks, interpolator, resolver,
+                max_workers, chunksize, threshold)
+
+
+def render_files(paths: Iterable[str],
+                 out_paths: Optional[Sequence[str]] = None, *,
+                 interpolator: Optional[BaseInterpolator] = None,
+                 resolver: Optional[BaseResolver] = None,
+                 max_workers: Optional[int] = None,
+                 chunksize: int = 16,
+                 threshold: int = 64) -> List[str]:
+    """
+    Render template files across worker processes. See render_templates for
+    the common parameters.
+
+    :param paths: paths of the templates
+    :param out_paths: if set, paths of the rendered files, one per template,
+        which are written by the workers
+    :return: rendered templates if out_paths is not set, else out_paths, in
+        the order of paths
+    :raise KeyUnresolvedException: with the path of the template as source
+    """
+    paths = list(paths)
+    if out_paths is None:
+        tasks = [(path, None) for path in paths]
+    else:
+        out_paths = list(out_paths)
+        if len(out_paths) != len(paths):
+            raise ValueError("paths and out_paths must have the same length")
+        tasks = list(zip(paths, out_paths))
+    return _run(_render_file, tasks, interpolator, resolver, max_workers,
+                chunksize, threshold)
@@ -22,8 +22,21 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import json
+import os
+from contextlib import contextmanager
 from os import environ
-from typing import Any, Dict, Optional
+from queue import Empty, Queue
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
+from typing import (IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List,
+                    Mapping, Optional, Tuple, Union)
+
+from varsubst.cache import CacheInfo, LRUCache
+
+if TYPE_CHECKING:
+    import sqlite3
 
 
 class BaseResolver:
@@ -40,6 +53,17 @@ class BaseResolver:
         """
         pass
 
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """
+        Resolve several keys at once. Resolvers with a costly lookup should
+        override it to fetch all keys in a single batch.
+
+        :return: a dictionary giving the value of each key, None if the key
+            doesn't exist.
+        """
+        resolve = self.resolve
+        return {key: resolve(key) for key in keys}
+
     def values(self) -> Dict[str, Any]:
         """
         Return all values available in the resolver.
@@ -52,14 +76,45 @@ class EnvResolver(BaseResolver):
     EnvResolver provide a value based on environnement variables.
     """
 
+    def __init__(self, snapshot: bool = False) -> None:
+        """
+        :param snapshot: if true, environment variables are captured once
+            into a dictionary. Later changes of the environment are ignored
+            until refresh() is called.
+        """
+        self.snapshot = snapshot
+        self._snapshot: Optional[Dict[str, str]] = None
+        self._snapshot_view: Optional[Mapping[str, str]] = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Capture environment variables again. Does nothing without snapshot.
+        """
+        if self.snapshot:
+            self._snapshot = dict(environ)
+            self._snapshot_view = MappingProxyType(self._snapshot)
+
     def resolve(self, key: str) -> Optional[Any]:
         """
         Resolver should be able to produce a value for a given key.
         If key doesn't exist, should return None.
         """
+        if self._snapshot is not None:
+            return self._snapshot.get(key)
         return environ.get(key)
 
-    def values(self) -> Dict[str, Any]:
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        get = environ.get if self._snapshot is None else self._snapshot.get
+        return {key: get(key) for key in keys}
+
+    def values(self) -> Mapping[str, Any]:
+        """
+        Return all values available in the resolver. With snapshot, it is a
+        read-only view of the captured variables, which is not copied.
+        """
+        if self._snapshot_view is not None:
+            return self._snapshot_view
         return environ.copy()
 
 
@@ -81,8 +136,767 @@ class DictResolver(BaseResolver):
         """
         return self.dict.get(key)
 
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        get = self.dict.get
+        return {key: get(key) for key in keys}
+
     def values(self) -> Dict[str, Any]:
         """
         Return all values available in the resolver.
         """
         return self.dict.copy()
+
+
+class FileResolver(BaseResolver):
+    """
+    Abstract base class for resolvers reading values from a file. Don't
+    instantiate it.
+
+    The file is parsed on the first lookup and its values are kept in
+    memory. It is parsed again only when its modification time or its size
+    changes. The file is checked at most once per check_interval seconds,
+    so that lookups don't hit the file system.
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8',
+                 check_interval: float = 1) -> None:
+        """
+        :param path: path of the file
+        :param encoding: encoding of the file
+        :param check_interval: minimum number of seconds between two checks
+            of the file for changes. 0 checks it on every lookup.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.check_interval = check_interval
+        self._lock = Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._values: Mapping[str, Any] = MappingProxyType({})
+
+    def _parse(self, reader: IO[str]) -> Dict[str, Any]:
+        """
+        :return: the values of the file
+        """
+        raise NotImplementedError
+
+    def _index(self) -> Mapping[str, Any]:
+        checked_at = self._checked_at
+        if checked_at is not None and \
+                monotonic() - checked_at < self.check_interval:
+            return self._values
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    with open(self.path, encoding=self.encoding) as reader:
+                        self._values = MappingProxyType(self._parse(reader))
+                    # values are set first, so that a lookup seeing the new
+                    # signature gets the new values.
+                    self._signature = signature
+        self._checked_at = monotonic()
+        return self._values
+
+    def reload(self) -> None:
+        """
+        Parse the file again on the next lookup, even if it didn't change.
+        """
+        self._signature = None
+        self._checked_at = None
+
+    def resolve(self, key: str) -> Optional[Any]:
+        """
+        Resolver should be able to produce a value for a given key.
+        If key doesn't exist, should return None.
+        """
+        return self._index().get(key)
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        get = self._index().get
+        return {key: get(key) for key in keys}
+
+    def values(self) -> Mapping[str, Any]:
+        """
+        Return all values of the file. It is a read-only view, which is not
+        copied and remains the same object until the file is parsed again.
+        """
+        return self._index()
+
+
+class DotenvResolver(FileResolver):
+    """
+    DotenvResolver provide values from a dotenv file of KEY=value lines.
+
+    Blank lines and lines starting with # are ignored, as well as an export
+    prefix. Values may be enclosed in single or double quotes.
+    """
+
+    def _parse(self, reader: IO[str]) -> Dict[str, Any]:
+        values = {}
+        for line in reader:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('export '):
+                line = line[len('export '):]
+            key, separator, value = line.partition('=')
+            if not separator:
+                continue
+            value = value.strip()
+            if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            values[key.strip()] = value
+        return values
+
+
+class _DocumentResolver(FileResolver):
+    """
+    Base class for resolvers reading a mapping from a JSON or YAML file.
+
+    Numbers, booleans and other scalars which aren't strings are converted
+    to strings, booleans and numbers being written as in JSON, so that they
+    can be substituted. None, lists and mappings are kept as is, e.g. for
+    jinja templates iterating them.
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8',
+                 check_interval: float = 1, raw: bool = False) -> None:
+        """
+        :param path: path of the file
+        :param encoding: encoding of the file
+        :param check_interval: minimum number of seconds between two checks
+            of the file for changes. 0 checks it on every lookup.
+        :param raw: if true, values are kept as parsed
+        """
+        super().__init__(path, encoding, check_interval)
+        self.raw = raw
+
+    def _parse_document(self, reader: IO[str]) -> Dict[str, Any]:
+        """
+        :return: the values of the file, as parsed
+        """
+        raise NotImplementedError
+
+    def _parse(self, reader: IO[str]) -> Dict[str, Any]:
+        values = self._parse_document(reader)
+        if self.raw:
+            return values
+        return {key: _scalar_to_str(value) for key, value in values.items()}
+
+
+def _scalar_to_str(value: Any) -> Any:
+    if value is None or isinstance(value, (str, list, dict)):
+        return value
+    if isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    return str(value)
+
+
+class JsonResolver(_DocumentResolver):
+    """
+    JsonResolver provide values from a file holding a JSON object.
+    """
+
+    def _parse_document(self, reader: IO[str]) -> Dict[str, Any]:
+        values = json.load(reader)
+        if not isinstance(values, dict):
+            raise ValueError(f"{self.path} must contain a JSON object")
+        return values
+
+
+class YamlResolver(_DocumentResolver):
+    """
+    YamlResolver provide values from a file holding a YAML mapping. It
+    requires pyyaml, which is only imported when the file is parsed.
+    """
+
+    def _parse_document(self, reader: IO[str]) -> Dict[str, Any]:
+        import yaml
+        values = yaml.safe_load(reader)
+        if values is None:
+            return {}
+        if not isinstance(values, dict):
+            raise ValueError(f"{self.path} must contain a YAML mapping")
+        return values
+
+
+class _Index:
+    """
+    Merged values of the resolvers of a ChainResolver, with the position of
+    the resolver supplying each key.
+    """
+
+    def __init__(self, resolvers: Tuple[BaseResolver, ...]) -> None:
+        self.values: Dict[str, Any] = {}
+        self.sources: Dict[str, int] = {}
+        self.file_values: List[Tuple[FileResolver, Mapping[str, Any]]] = []
+        for position in reversed(range(len(resolvers))):
+            resolver = resolvers[position]
+            values = resolver.values()
+            if isinstance(resolver, FileResolver):
+                self.file_values.append((resolver, values))
+            self.values.update(values)
+            self.sources.update(dict.fromkeys(values, position))
+        self.view: Mapping[str, Any] = MappingProxyType(self.values)
+
+
+class ChainResolver(BaseResolver):
+    """
+    ChainResolver provide values from several resolvers, the first one
+    resolving a key taking precedence.
+
+    In live mode, resolvers are tried in order until one resolves the key.
+    Misses are cached: a key is next looked up from the resolver which
+    supplied it, and a key no resolver supplies isn't looked up again. Call
+    clear() to forget them.
+
+    Once frozen, values of the resolvers are merged into a read-only index,
+    so that a lookup is a single dictionary hit whatever the number of
+    resolvers. Call freeze() again to rebuild it.
+    """
+
+    def __init__(self, *resolvers: BaseResolver) -> None:
+        """
+        :param resolvers: resolvers, by order of precedence
+        """
+        self.resolvers = resolvers
+        self._lock = Lock()
+        self._starts: Dict[str, int] = {}
+        self._index: Optional[_Index] = None
+
+    def freeze(self) -> 'ChainResolver':
+        """
+        Merge the values of the resolvers into an index used by lookups.
+
+        :return: the resolver itself
+        """
+        self._index = _Index(self.resolvers)
+        return self
+
+    def thaw(self) -> None:
+        """
+        Drop the index and go back to live mode.
+        """
+        self._index = None
+        self.clear()
+
+    @property
+    def frozen(self) -> bool:
+        """
+        :return: True if lookups use the merged index
+        """
+        return self._index is not None
+
+    def clear(self) -> None:
+        """
+        Forget the misses cached in live mode.
+        """
+        self._starts = {}
+
+    def _get_index(self) -> Optional[_Index]:
+        return self._index
+
+    def _lookup(self, key: str) -> Tuple[Optional[Any], Optional[int]]:
+        resolvers = self.resolvers
+        start = self._starts.get(key, 0)
+        for position in range(start, len(resolvers)):
+            value = resolvers[position].resolve(key)
+            if value is not None:
+                if position != start:
+                    self._starts[key] = position
+                return value, position
+        self._starts[key] = len(resolvers)
+        return None, None
+
+    def resolve(self, key: str) -> Optional[Any]:
+        """
+        Resolver should be able to produce a value for a given key.
+        If key doesn't exist, should return None.
+        """
+        index = self._get_index()
+        if index is not None:
+            return index.values.get(key)
+        return self._lookup(key)[0]
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """
+        In live mode, each resolver is asked once for the keys still
+        unresolved, with its resolve_many.
+        """
+        index = self._get_index()
+        if index is not None:
+            get = index.values.get
+            return {key: get(key) for key in keys}
+        keys = list(dict.fromkeys(keys))
+        starts = self._starts
+        result = {}
+        pending = keys
+        for position, resolver in enumerate(self.resolvers):
+            asked = [key for key in pending if starts.get(key, 0) <= position]
+            if not asked:
+                continue
+            values = resolver.resolve_many(asked)
+            unresolved = []
+            for key in pending:
+                value = values.get(key)
+                if value is None:
+                    unresolved.append(key)
+                else:
+                    result[key] = value
+                    starts[key] = position
+            pending = unresolved
+            if not pending:
+                break
+        for key in pending:
+            starts[key] = len(self.resolvers)
+        return {key: result.get(key) for key in keys}
+
+    def source(self, key: str) -> Optional[BaseResolver]:
+        """
+        :return: the resolver supplying the value of key, None if no
+            resolver does
+        """
+        index = self._get_index()
+        if index is not None:
+            position = index.sources.get(key)
+        else:
+            position = self._lookup(key)[1]
+        return None if position is None else self.resolvers[position]
+
+    def values(self) -> Mapping[str, Any]:
+        """
+        Return all merged values. Once frozen, it is a read-only view of the
+        index, which is not copied.
+        """
+        index = self._get_index()
+        if index is not None:
+            return index.view
+        values = {}
+        for resolver in reversed(self.resolvers):
+            values.update(resolver.values())
+        return values
+
+
+class LayeredResolver(ChainResolver):
+    """
+    LayeredResolver is a ChainResolver which is always frozen.
+
+    The index is built on the first lookup, and built again when a file
+    layer is parsed again. File layers are checked at most once per
+    check_interval seconds, so that a lookup is a single dictionary hit.
+    Values of other layers are captured when the index is built, refresh()
+    builds it again.
+    """
+
+    def __init__(self, *layers: BaseResolver,
+                 check_interval: float = 1) -> None:
+        """
+        :param layers: resolvers, by order of precedence
+        :param check_interval: minimum number of seconds between two checks
+            of the file layers for changes
+        """
+        super().__init__(*layers)
+        self.layers = layers
+        self.check_interval = check_interval
+        self._checked_at: Optional[float] = None
+
+    def refresh(self) -> None:
+        """
+        Merge the values of the layers again.
+        """
+        self.freeze()
+
+    def _get_index(self) -> _Index:
+        index = self._index
+        if index is not None:
+            checked_at = self._checked_at
+            if checked_at is not None and \
+                    monotonic() - checked_at < self.check_interval:
+                return index
+            if all(layer.values() is values
+                   for layer, values in index.file_values):
+                self._checked_at = monotonic()
+                return index
+        with self._lock:
+            if self._index is index:
+                self.freeze()
+            self._checked_at = monotonic()
+            return self._index
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteResolver(BaseResolver):
+    """
+    SqliteResolver provide values from a key/value table of a SQLite
+    database.
+
+    Connections are kept in a pool shared by threads. resolve_many looks up
+    all keys with a single query per chunk of max_variables keys. Values may
+    be loaded in memory once with warm().
+    """
+
+    max_variables = 999
+    """
+    Maximum number of parameters of a query, the default limit of SQLite
+    before 3.32.
+    """
+
+    def __init__(self, database: str, table: str = 'variables',
+                 key_column: str = 'key', value_column: str = 'value',
+                 pool_size: int = 4, timeout: Optional[float] = None,
+                 warm: bool = False) -> None:
+        """
+        :param database: path of the database
+        :param table: table holding the values
+        :param key_column: column of the keys
+        :param value_column: column of the values
+        :param pool_size: maximum number of connections
+        :param timeout: if set, number of seconds to wait for a connection
+            when all of them are in use, :class:`TimeoutError` is raised
+            when it expires
+        :param warm: if true, load all values in memory on the first lookup
+        """
+        self.database = database
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pool: Queue = Queue()
+        self._connections: List['sqlite3.Connection'] = []
+        self._lock = Lock()
+        self._warm = warm
+        self._warm_lock = Lock()
+        self._values: Optional[Mapping[str, Any]] = None
+        source = f"FROM {_quote_identifier(table)}"
+        key = _quote_identifier(key_column)
+        value = _quote_identifier(value_column)
+        self._select_all = f"SELECT {key}, {value} {source}"
+        self._select_one = f"SELECT {value} {source} WHERE {key} = ?"
+        self._select_in = f"SELECT {key}, {value} {source} WHERE {key} IN "
+        self._select_chunk = self._select_many(self.max_variables)
+
+    def _select_many(self, count: int) -> str:
+        return self._select_in + '(' + ', '.join('?' * count) + ')'
+
+    def _connect(self) -> 'sqlite3.Connection':
+        import sqlite3
+        return sqlite3.connect(self.database, check_same_thread=False)
+
+    def _acquire(self) -> Tuple[Queue, 'sqlite3.Connection']:
+        """
+        :return: the pool the connection belongs to, and the connection
+        """
+        while True:
+            pool = self._pool
+            try:
+                connection = pool.get_nowait()
+            except Empty:
+                with self._lock:
+                    if pool is self._pool and \
+                            len(self._connections) < self.pool_size:
+                        connection = self._connect()
+                        self._connections.append(connection)
+                        return pool, connection
+                try:
+                    connection = pool.get(timeout=self.timeout)
+                except Empty:
+                    raise TimeoutError(
+                        f"No connection to {self.database} available after "
+                        f"{self.timeout} seconds") from None
+            # None wakes up threads waiting on a pool which has been closed
+            if connection is not None:
+                return pool, connection
+
+    @contextmanager
+    def _connection(self) -> Iterator['sqlite3.Connection']:
+        pool, connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            if pool is self._pool:
+                pool.put(connection)
+            else:
+                # the pool has been closed while the connection was in use
+                connection.close()
+                pool.put(None)
+
+    def warm(self) -> Mapping[str, Any]:
+        """
+        Load all values in memory. Lookups then use them instead of the
+        database, until warm() is called again.
+
+        :return: a read-only view of the values
+        """
+        with self._connection() as connection:
+            self._values = MappingProxyType(
+                dict(connection.execute(self._select_all)))
+        return self._values
+
+    def _warm_values(self) -> Optional[Mapping[str, Any]]:
+        if self._values is None and self._warm:
+            with self._warm_lock:
+                if self._values is None:
+                    self.warm()
+        return self._values
+
+    def resolve(self, key: str) -> Optional[Any]:
+        """
+        Resolver should be able to produce a value for a given key.
+        If key doesn't exist, should return None.
+        """
+        values = self._warm_values()
+        if values is not None:
+            return values.get(key)
+        with self._connection() as connection:
+            row = connection.execute(self._select_one, (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        values = self._warm_values()
+        if values is not None:
+            get = values.get
+            return {key: get(key) for key in keys}
+        distinct_keys = list(dict.fromkeys(keys))
+        found = {}
+        size = self.max_variables
+        with self._connection() as connection:
+            for start in range(0, len(distinct_keys), size):
+                chunk = distinct_keys[start:start + size]
+                if len(chunk) == size:
+                    query = self._select_chunk
+                else:
+                    query = self._select_many(len(chunk))
+                found.update(connection.execute(query, chunk))
+        get = found.get
+        return {key: get(key) for key in distinct_keys}
+
+    def values(self) -> Mapping[str, Any]:
+        """
+        Return all values of the table. Once warm, it is a read-only view of
+        the values in memory, which is not copied.
+        """
+        values = self._warm_values()
+        if values is not None:
+            return values
+        with self._connection() as connection:
+            return dict(connection.execute(self._select_all))
+
+    def close(self) -> None:
+        """
+        Close all connections of the pool. Connections in use are closed
+        when they are released. Connections are opened again on the next
+        lookup.
+        """
+        with self._lock:
+            pool = self._pool
+            self._pool = Queue()
+            self._connections = []
+        while True:
+            try:
+                connection = pool.get_nowait()
+            except Empty:
+                break
+            if connection is not None:
+                connection.close()
+
+    def __enter__(self) -> 'SqliteResolver':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ResolverMapping(Mapping):
+    """
+    Read-only mapping view over a resolver.
+
+    Keys are resolved only when they are looked up, and each key is resolved
+    at most once per view. Iterating over the view relies on the values of
+    the resolver.
+    """
+
+    def __init__(self, resolver: BaseResolver,
+                 resolved: Optional[Dict[str, Optional[Any]]] = None) -> None:
+        """
+        :param resolver: resolver providing the values of the mapping
+        :param resolved: values already resolved, e.g. with resolve_many
+        """
+        self.resolver = resolver
+        self._resolved: Dict[str, Optional[Any]] = dict(resolved or ())
+
+    def _resolve(self, key: str) -> Optional[Any]:
+        try:
+            return self._resolved[key]
+        except KeyError:
+            value = self._resolved[key] = self.resolver.resolve(key)
+            return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._resolve(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._resolve(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.resolver.values())
+
+    def __len__(self) -> int:
+        return len(self.resolver.values())
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        :return: the values resolved so far, e.g. for jinja tracebacks
+        """
+        return {key: value for key, value in self._resolved.items()
+                if value is not None}
+
+
+_missing = object()
+
+
+class CachingResolver(BaseResolver):
+    """
+    CachingResolver memoizes the values provided by another resolver.
+
+    Unresolved keys are cached as well, so that a missing key doesn't hit
+    the inner resolver on every lookup.
+    """
+
+    def __init__(self, inner: BaseResolver, maxsize: int = 128,
+                 ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None) -> None:
+        """
+        :param inner: resolver providing the values
+        :param maxsize: number of keys to keep, the least recently used ones
+            being evicted
+        :param ttl: if set, number of seconds a resolved value is kept
+        :param negative_ttl: if set, number of seconds an unresolved key is
+            kept. Defaults to ttl.
+        """
+        self.inner = inner
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._cache = LRUCache(maxsize)
+
+    def _put(self, key: str, value: Optional[Any]) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        self._cache.put(key, value, ttl)
+
+    def resolve(self, key: str) -> Optional[Any]:
+        """
+        Resolver should be able to produce a value for a given key.
+        If key doesn't exist, should return None.
+        """
+        value = self._cache.get(key, _missing)
+        if value is _missing:
+            value = self.inner.resolve(key)
+            self._put(key, value)
+        return value
+
+    def resolve_many(self, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """
+        Keys which are not cached are resolved with a single call to the
+        resolve_many of the inner resolver.
+        """
+        result = {}
+        missing = []
+        for key in keys:
+            value = self._cache.get(key, _missing)
+            if value is _missing:
+                missing.append(key)
+            else:
+                result[key] = value
+        if missing:
+            for key, value in self.inner.resolve_many(missing).items():
+                self._put(key, value)
+                result[key] = value
+        return result
+
+    def values(self) -> Dict[str, Any]:
+        """
+        Return all values of the inner resolver, which are not cached.
+        """
+        return self.inner.values()
+
+    def invalidate(self, key: str) -> None:
+        """
+        Forget the value cached for key.
+        """
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        """
+        Forget all cached values.
+        """
+        self._cache.clear()
+
+    def cache_info(self) -> CacheInfo:
+        return self._cache.info()
+
+
+class AsyncBaseResolver:
+    """
+    Abstract base class for asynchronous resolvers. Don't instantiate it.
+
+    An asynchronous resolver is intented to provide values from keys through
+    I/O bound sources, so that many keys may be resolved concurrently.
+    """
+
+    async def resolve(self, key: str) -> Optional[Any]:
+        """
+        Resolver should be able to produce a value for a given key.
+        If key doesn't exist, should return None.
+        """
+        pass
+
+    async def resolve_many(self, keys: Iterable[str],
+                           concurrency: Optional[int] = None
+                           ) -> Dict[str, Optional[Any]]:
+        """
+        Resolve several keys concurrently.
+
+        :param concurrency: if set, maximum number of keys being resolved at
+            the same time
+        :return: a dictionary giving the value of each key, None if the key
+            doesn't exist.
+        """
+        # asyncio is slow to import and only needed by asynchronous callers
+        import asyncio
+        keys = list(keys)
+        if concurrency is None:
+            values = await asyncio.gather(*map(self.resolve, keys))
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def resolve(key: str) -> Optional[Any]:
+                async with semaphore:
+                    return await self.resolve(key)
+
+            values = await asyncio.gather(*map(resolve, keys))
+        return dict(zip(keys, values))
+
+    async def values(self) -> Dict[str, Any]:
+        """
+        Return all values available in the resolver.
+        """
+        pass
+
+
+async def aresolve_many(resolver: Union[BaseResolver, AsyncBaseResolver],
+                        keys: Iterable[str],
+                        concurrency: Optional[int] = None
+                        ) -> Dict[str, Optional[Any]]:
+    """
+    Resolve keys with either a resolver or an asynchronous resolver.
+
+    :param concurrency: if set, maximum number of keys being resolved at the
+        same time by an asynchronous resolver
+    """
+    if isinstance(resolver, AsyncBaseResolver):
+        return await resolver.resolve_many(keys, concurrency)
+    return resolver.resolve_many(keys)
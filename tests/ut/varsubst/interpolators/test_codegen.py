@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import pytest
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import ShellInterpolator
+from varsubst.interpolators.codegen import generate_source
+from varsubst.resolvers import DictResolver
+
+resolver = DictResolver({'FOO': 'foo', 'BAR': '', 'BAZ': 'baz'})
+
+
+def random_templates(count: int):
+    alphabet = ['$', '{', '}', '-', ':-', '\\', 'FOO', 'BAR', 'NOPE', ' ',
+                "'", '"']
+    rnd = random.Random(20202)
+    for _ in range(count):
+        yield ''.join(rnd.choice(alphabet)
+                      for _ in range(rnd.randint(0, 16)))
+
+
+def render(interpolator: ShellInterpolator, template):
+    try:
+        return interpolator.render(template, resolver)
+    except KeyUnresolvedException as e:
+        return KeyUnresolvedException, e.key
+
+
+@pytest.mark.parametrize('fail_on_unresolved', [True, False])
+def test_same_render(fail_on_unresolved):
+    interpreter = ShellInterpolator(fail_on_unresolved)
+    generated = ShellInterpolator(fail_on_unresolved, codegen=True)
+    for template in random_templates(2000):
+        expected = render(interpreter, template)
+        assert render(generated, template) == expected, template
+        expected = render(interpreter, template.encode())
+        assert render(generated, template.encode()) == expected, template
+
+
+def test_source():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile("a '$FOO' ${BAR:-$BAZ} ${QUX-x}")
+    source = generate_source(compiled.segments, compiled.keys,
+                             compiled.required_keys, True, '')
+    assert source == (
+        "def substitute(values):\n"
+        "    get = values.get\n"
+        "    v0 = get('FOO')\n"
+        "    v1 = get('BAR')\n"
+        "    v2 = get('BAZ')\n"
+        "    v3 = get('QUX')\n"
+        "    if v0 is None:\n"
+        "        raise KeyUnresolvedException('FOO')\n"
+        "    if v2 is None:\n"
+        "        raise KeyUnresolvedException('BAZ')\n"
+        "    return ''.join((\"a '\", (v0 or ''), \"' \", "
+        "(v1 or (v2 or '')), ' ', ('x' if v3 is None else (v3 or '')), ))\n"
+    )
+
+
+def test_compiled_with_cache():
+    interpolator = ShellInterpolator(fail_on_unresolved=True, codegen=True,
+                                     cache_size=2)
+    compiled = interpolator.compile('$FOO')
+    assert interpolator.compile('$FOO') is compiled
+    assert compiled.render(resolver) == 'foo'
+    assert compiled.substitute({'FOO': 'bar'}) == 'bar'
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Optional
+
+import pytest
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import CompiledTemplate, ShellInterpolator
+from varsubst.resolvers import BaseResolver, DictResolver
+
+resolved_suffix = '_resolved'
+unresolved_suffix = '_unresolved'
+empty_suffix = '_empty'
+
+
+class DummyResolver(BaseResolver):
+    def resolve(self, key: str) -> Optional[str]:
+        if key.endswith(unresolved_suffix):
+            return None
+        elif key.endswith(empty_suffix):
+            return ''
+        else:
+            return key + resolved_suffix
+
+
+def test_segments():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile(
+        r'a $FOO ${BAR} ${BAZ-x $QUX} ${QUUX:-y} \$ESCAPED')
+    assert isinstance(compiled, CompiledTemplate)
+    assert compiled.segments == (
+        'a ',
+        ('FOO', None, None),
+        ' ',
+        ('BAR', None, None),
+        ' ',
+        ('BAZ', '-', ('x ', ('QUX', None, None))),
+        ' ',
+        ('QUUX', ':-', ('y',)),
+        r' \$ESCAPED',
+    )
+
+
+def test_render_many_times():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile('Hello ${NAME:-nobody}!')
+    assert compiled.render(DictResolver({'NAME': 'foo'})) == 'Hello foo!'
+    assert compiled.render(DictResolver({'NAME': ''})) == 'Hello nobody!'
+    assert compiled.render(DictResolver({})) == 'Hello nobody!'
+
+
+def test_same_result_as_render():
+    template = 'abc $FOO def ${BAR2:-$BAZ} ${NOPE' + unresolved_suffix + '-x}'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    expected = interpolator.render(template, DummyResolver())
+    actual = interpolator.compile(template).render(DummyResolver())
+    assert actual == expected
+
+
+def test_unresolved_key_exception():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile('abc ${FOO' + unresolved_suffix + '}')
+    with pytest.raises(KeyUnresolvedException):
+        compiled.render(DummyResolver())
+
+
+def test_unresolved_key_in_unused_default():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile(
+        '${FOO:-$BAR' + unresolved_suffix + '}')
+    with pytest.raises(KeyUnresolvedException):
+        compiled.render(DummyResolver())
+
+
+def test_unresolved_key_fallback():
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    compiled = interpolator.compile('abc $FOO' + unresolved_suffix + ' def')
+    assert compiled.render(DummyResolver()) == 'abc  def'
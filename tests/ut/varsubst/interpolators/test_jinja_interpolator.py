@@ -22,16 +22,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
+import io
 from typing import Dict, Optional
 
+import pytest
+from jinja2 import StrictUndefined, UndefinedError
 from jinja2.environment import Environment
 
 from varsubst.interpolators.jinja_interpolator import JinjaInterpolator
-from varsubst.resolvers import BaseResolver
-
-resolved_suffix = '_resolved'
-unresolved_suffix = '_unresolved'
-empty_suffix = '_empty'
+from varsubst.resolvers import AsyncBaseResolver, BaseResolver, DictResolver
 
 
 class DummyResolver(BaseResolver):
@@ -41,12 +41,7 @@ class DummyResolver(BaseResolver):
         return self._dict.copy()
 
     def resolve(self, key: str) -> Optional[str]:
-        if key.endswith(unresolved_suffix):
-            return None
-        elif key.endswith(empty_suffix):
-            return ''
-        else:
-            return key + resolved_suffix
+        return self._dict.get(key)
 
 
 def test_simple_template():
@@ -65,3 +60,155 @@ def test_overrided_environment():
     actual = jinja_interpolator.render(template, resolver=DummyResolver())
     expected = "Hello Foo BAR"
     assert actual == expected
+
+
+def test_cache():
+    jinja_interpolator = JinjaInterpolator(Environment(), cache_size=1)
+    jinja_interpolator.render("{{ firstname }}", resolver=DummyResolver())
+    jinja_interpolator.render("{{ firstname }}", resolver=DummyResolver())
+    jinja_interpolator.render("{{ lastname }}", resolver=DummyResolver())
+    info = jinja_interpolator.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 2, 1)
+    jinja_interpolator.cache_clear()
+    assert jinja_interpolator.cache_info().currsize == 0
+
+
+def test_cache_disabled():
+    jinja_interpolator = JinjaInterpolator(Environment(), cache_size=None)
+    actual = jinja_interpolator.render("{{ firstname }}",
+                                       resolver=DummyResolver())
+    assert actual == "foo"
+    assert jinja_interpolator.cache_info() is None
+
+
+def test_cache_invalidated_on_environment_change():
+    environment = Environment()
+    environment.globals['greeting'] = 'Hello'
+    environment.filters['shout'] = lambda value: value.upper()
+    jinja_interpolator = JinjaInterpolator(environment)
+    template = "{{ greeting }} {{ firstname | shout }}"
+    actual = jinja_interpolator.render(template, resolver=DummyResolver())
+    assert actual == "Hello FOO"
+    environment.globals['greeting'] = 'Bye'
+    environment.filters['shout'] = lambda value: value + '!'
+    jinja_interpolator.cache_clear()
+    actual = jinja_interpolator.render(template, resolver=DummyResolver())
+    assert actual == "Bye foo!"
+    assert jinja_interpolator.cache_info().misses == 1
+    environment.filters['whisper'] = lambda value: value.lower()
+    actual = jinja_interpolator.render("{{ 'A' | whisper }}",
+                                       resolver=DummyResolver())
+    assert actual == "a"
+    environment.filters.pop('whisper')
+    jinja_interpolator.render(template, resolver=DummyResolver())
+    assert jinja_interpolator.cache_info().misses == 1
+    assert jinja_interpolator.cache_info().currsize == 1
+
+
+class LookupOnlyResolver(BaseResolver):
+    def __init__(self) -> None:
+        self.resolved = []
+
+    def values(self) -> Dict[str, str]:
+        raise AssertionError("values shouldn't be used while rendering")
+
+    def resolve(self, key: str) -> Optional[str]:
+        self.resolved.append(key)
+        return key.upper() if key != 'unknown' else None
+
+
+def test_lazy_resolution():
+    template = "{{ firstname }} {{ unknown | default('-') }} {{ firstname }}"
+    resolver = LookupOnlyResolver()
+    actual = JinjaInterpolator(Environment()).render(template, resolver)
+    assert actual == "FIRSTNAME - FIRSTNAME"
+    assert sorted(resolver.resolved) == ['firstname', 'unknown']
+
+
+def test_resolved_values_override_globals():
+    environment = Environment()
+    environment.globals['firstname'] = 'global'
+    jinja_interpolator = JinjaInterpolator(environment)
+    actual = jinja_interpolator.render("{{ firstname }} {{ other }}",
+                                       resolver=DummyResolver())
+    assert actual == "foo "
+    environment.globals['other'] = 'global'
+    actual = jinja_interpolator.render("{{ other }}",
+                                       resolver=DummyResolver())
+    assert actual == "global"
+
+
+def test_render_strict_undefined():
+    interpolator = JinjaInterpolator(Environment(undefined=StrictUndefined))
+    with pytest.raises(UndefinedError):
+        interpolator.render('{{ MISSING }}', DummyResolver())
+
+
+def test_render_runtime_error():
+    with pytest.raises(ZeroDivisionError):
+        JinjaInterpolator().render('{{ 1 / x }}', DictResolver({'x': 0}))
+
+
+class BatchResolver(DummyResolver):
+    def __init__(self) -> None:
+        self.batches = []
+
+    def resolve_many(self, keys):
+        self.batches.append(sorted(keys))
+        return super().resolve_many(keys)
+
+
+def test_keys_resolved_in_batch():
+    template = ("{% set greeting = 'Hello' %}{{ greeting }} "
+                "{{ firstname }} {{ lastname }} {{ firstname }}")
+    resolver = BatchResolver()
+    actual = JinjaInterpolator(Environment()).render(template, resolver)
+    assert actual == "Hello foo bar foo"
+    assert resolver.batches == [['firstname', 'lastname']]
+
+
+class AsyncDummyResolver(AsyncBaseResolver):
+    async def resolve(self, key: str) -> Optional[str]:
+        await asyncio.sleep(0)
+        return DummyResolver._dict.get(key)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_arender():
+    template = "Hello {{ firstname | capitalize }} {{ lastname | upper }}"
+    jinja_interpolator = JinjaInterpolator(Environment())
+    actual = run(jinja_interpolator.arender(template, AsyncDummyResolver()))
+    assert actual == "Hello Foo BAR"
+    actual = run(jinja_interpolator.arender(template, DummyResolver()))
+    assert actual == "Hello Foo BAR"
+
+
+def test_arender_async_environment():
+    template = "Hello {{ firstname | capitalize }}"
+    jinja_interpolator = JinjaInterpolator(Environment(enable_async=True))
+    actual = run(jinja_interpolator.arender(template, AsyncDummyResolver(),
+                                            concurrency=1))
+    assert actual == "Hello Foo"
+
+
+def test_render_stream():
+    template = "{% for i in range(3) %}{{ firstname }}{% endfor %}"
+    writer = io.StringIO()
+    JinjaInterpolator(Environment()).render_stream(
+        io.StringIO(template), writer, DummyResolver())
+    assert writer.getvalue() == "foofoofoo"
+
+
+def test_render_many():
+    templates = ["{{ firstname }}", "{{ firstname }} {{ lastname }}"]
+    resolver = BatchResolver()
+    actual = JinjaInterpolator(Environment()).render_many(templates, resolver)
+    assert actual == ["foo", "foo bar"]
+    assert resolver.batches == [['firstname'], ['lastname']]
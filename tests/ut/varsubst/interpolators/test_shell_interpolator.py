@@ -22,14 +22,18 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
+import io
 import os
 from typing import Optional
 
 import pytest
 
-from varsubst.exceptions import KeyUnresolvedException
-from varsubst.interpolators import ShellInterpolator
-from varsubst.resolvers import BaseResolver
+from varsubst.disk_cache import DiskCache
+from varsubst.exceptions import KeysUnresolvedException, KeyUnresolvedException
+from varsubst.interpolators import (ShellInterpolator, UnresolvedLocation,
+                                    VariableInfo)
+from varsubst.resolvers import AsyncBaseResolver, BaseResolver, DictResolver
 
 resolved_suffix = '_resolved'
 unresolved_suffix = '_unresolved'
@@ -189,3 +193,357 @@ def test_unresolved_key_fallback():
     interpolator = ShellInterpolator(fail_on_unresolved=False)
     actual = interpolator.render(test_str, resolver=DummyResolver())
     assert actual == expected
+
+
+def test_cache_disabled_by_default():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    assert interpolator.cache_info() is None
+    assert interpolator.compile('$FOO') is not interpolator.compile('$FOO')
+
+
+def test_cache():
+    interpolator = ShellInterpolator(fail_on_unresolved=True, cache_size=2)
+    compiled = interpolator.compile('$FOO')
+    assert interpolator.compile('$FOO') is compiled
+    interpolator.render('$BAR', resolver=DummyResolver())
+    interpolator.render('$BAZ', resolver=DummyResolver())
+    info = interpolator.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 3, 1)
+    assert info.currsize == 2
+    interpolator.cache_clear()
+    assert interpolator.cache_info().currsize == 0
+
+
+class BatchResolver(DummyResolver):
+    def __init__(self) -> None:
+        self.batches = []
+
+    def resolve(self, key: str) -> Optional[str]:
+        raise AssertionError("keys should be resolved in batch")
+
+    def resolve_many(self, keys):
+        self.batches.append(list(keys))
+        return {key: DummyResolver.resolve(self, key) for key in keys}
+
+
+def test_keys_resolved_in_batch():
+    test_str = '$FOO ${BAR} $FOO ${BAZ:-$FOO $QUX}'
+    expected = 'FOO_resolved BAR_resolved FOO_resolved BAZ_resolved'
+    resolver = BatchResolver()
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = interpolator.render(test_str, resolver=resolver)
+    assert actual == expected
+    assert resolver.batches == [['FOO', 'BAR', 'BAZ', 'QUX']]
+
+
+class AsyncDummyResolver(AsyncBaseResolver):
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+
+    async def resolve(self, key: str) -> Optional[str]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return DummyResolver().resolve(key)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_arender():
+    test_str = '$FOO ${BAR} $FOO ${BAZ' + unresolved_suffix + ':-$QUX}'
+    expected = 'FOO_resolved BAR_resolved FOO_resolved QUX_resolved'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    resolver = AsyncDummyResolver()
+    assert run(interpolator.arender(test_str, resolver)) == expected
+    assert resolver.max_running == 4
+    resolver = AsyncDummyResolver()
+    assert run(interpolator.arender(test_str, resolver, 2)) == expected
+    assert resolver.max_running == 2
+    assert run(interpolator.arender(test_str, DummyResolver())) == expected
+
+
+def test_arender_unresolved_key_exception():
+    test_str = '$FOO' + unresolved_suffix
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    with pytest.raises(KeyUnresolvedException):
+        run(interpolator.arender(test_str, AsyncDummyResolver()))
+
+
+class RecordingWriter(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+def test_render_stream():
+    test_str = 'abc ${FOO:-x} $BAR ' * 100 + '${BAZ-$QUX}'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    expected = interpolator.render(test_str, resolver=DummyResolver())
+    writer = RecordingWriter()
+    interpolator.render_stream(io.StringIO(test_str), writer,
+                               resolver=DummyResolver(), chunk_size=64)
+    assert writer.getvalue() == expected
+    assert writer.writes > 1
+
+
+def test_render_stream_unresolved_key_exception():
+    test_str = 'abc $FOO' + unresolved_suffix
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    with pytest.raises(KeyUnresolvedException):
+        interpolator.render_stream(io.StringIO(test_str), io.StringIO(),
+                                   resolver=DummyResolver(), chunk_size=5)
+
+
+def test_bytes():
+    test_str = b'\xff $FOO ${BAR:-\xe9 $BAZ} \\$QUX'
+    expected = b'\xff FOO_resolved BAR_resolved \\$QUX'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = interpolator.render(test_str, resolver=DummyResolver())
+    assert actual == expected
+
+
+def test_bytes_encoding():
+    resolver = DictResolver({'FOO': '\xe9', 'BAR': b'\xff', 'EMPTY': ''})
+    test_str = b'$FOO $BAR ${EMPTY:-x} ${MISSING-$FOO}'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = interpolator.render(test_str, resolver)
+    assert actual == b'\xc3\xa9 \xff x \xc3\xa9'
+    interpolator = ShellInterpolator(fail_on_unresolved=True,
+                                     encoding='latin-1')
+    actual = interpolator.render(test_str, resolver)
+    assert actual == b'\xe9 \xff x \xe9'
+
+
+def test_render_file(tmp_path):
+    test_str = b'\xff abc $FOO ${BAR' + unresolved_suffix.encode() + \
+        b'-default} def \\$BAZ' * 1000
+    path = tmp_path / 'template'
+    path.write_bytes(test_str)
+    out_path = tmp_path / 'rendered'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    interpolator.render_file(str(path), str(out_path), DummyResolver())
+    expected = interpolator.render(test_str, DummyResolver())
+    assert out_path.read_bytes() == expected
+
+
+def test_render_file_in_place(tmp_path):
+    test_str = b'abc $FOO def ${BAR:-bar}\n' * 1000
+    path = tmp_path / 'template'
+    path.write_bytes(test_str)
+    path.chmod(0o640)
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    expected = interpolator.render(test_str, DummyResolver())
+    interpolator.render_file(str(path), str(path), DummyResolver())
+    assert path.read_bytes() == expected
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['template']
+
+
+def test_render_file_in_place_unresolved_key_exception(tmp_path):
+    test_str = b'abc $FOO' + unresolved_suffix.encode()
+    path = tmp_path / 'template'
+    path.write_bytes(test_str)
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    with pytest.raises(KeyUnresolvedException):
+        interpolator.render_file(str(path), str(path), DummyResolver())
+    assert path.read_bytes() == test_str
+    assert os.listdir(tmp_path) == ['template']
+
+
+def test_render_empty_file(tmp_path):
+    path = tmp_path / 'template'
+    path.write_bytes(b'')
+    out_path = tmp_path / 'rendered'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    interpolator.render_file(str(path), str(out_path), DummyResolver())
+    assert out_path.read_bytes() == b''
+
+
+def test_render_file_unresolved_key_exception(tmp_path):
+    path = tmp_path / 'template'
+    path.write_bytes(b'abc $FOO' + unresolved_suffix.encode())
+    out_path = tmp_path / 'rendered'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    with pytest.raises(KeyUnresolvedException):
+        interpolator.render_file(str(path), str(out_path), DummyResolver())
+    assert not out_path.exists()
+
+
+def test_render_many():
+    templates = ['$FOO ${BAR}', '${BAR:-x} $BAZ', 'no variable', '$FOO']
+    expected = ['FOO_resolved BAR_resolved', 'BAR_resolved BAZ_resolved',
+                'no variable', 'FOO_resolved']
+    resolver = BatchResolver()
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    assert interpolator.render_many(templates, resolver) == expected
+    assert resolver.batches == [['FOO', 'BAR', 'BAZ']]
+
+
+def test_render_many_unresolved_keys():
+    templates = ['$FOO' + unresolved_suffix, '$BAR',
+                 '${BAZ' + unresolved_suffix + '-x} $QUX' + unresolved_suffix,
+                 '$FOO' + unresolved_suffix]
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    with pytest.raises(KeysUnresolvedException) as e:
+        interpolator.render_many(templates, DummyResolver())
+    assert e.value.keys == ['FOO' + unresolved_suffix,
+                            'QUX' + unresolved_suffix]
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    actual = interpolator.render_many(templates, DummyResolver())
+    assert actual == ['', 'BAR_resolved', 'x ', '']
+
+
+def test_render_rows():
+    template = '$ID: ${NAME:-nobody} ${TITLE-none}'
+    rows = [{'ID': '1', 'NAME': 'foo', 'TITLE': 'dr'},
+            {'ID': '2', 'NAME': ''},
+            {'ID': '3', 'NAME': 'bar', 'TITLE': ''}]
+    expected = ['1: foo dr', '2: nobody none', '3: bar ']
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = interpolator.render_rows(template, iter(rows))
+    assert not isinstance(actual, list)
+    assert list(actual) == expected
+    columns = {'ID': ['1', '2', '3'], 'NAME': ['foo', '', 'bar'],
+               'TITLE': ['dr', None, '']}
+    assert list(interpolator.render_rows(template, columns)) == expected
+
+
+def test_render_rows_bytes():
+    template = b'$ID ${NAME-\xff}'
+    columns = {'ID': [1, 2], 'NAME': ['\xe9', None]}
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = list(interpolator.render_rows(template, columns))
+    assert actual == [b'1 \xc3\xa9', b'2 \xff']
+
+
+@pytest.mark.parametrize('codegen', [False, True])
+def test_render_rows_numbers(codegen):
+    template = 'id=$ID ${SCORE:-none}'
+    rows = [{'ID': 1, 'SCORE': 0.5}, {'ID': 2, 'SCORE': 0}, {'ID': 3}]
+    expected = ['id=1 0.5', 'id=2 0', 'id=3 none']
+    interpolator = ShellInterpolator(fail_on_unresolved=True,
+                                     cache_size=2, codegen=codegen)
+    assert list(interpolator.render_rows(template, rows)) == expected
+    columns = {'ID': [1, 2, 3], 'SCORE': [0.5, 0, None]}
+    assert list(interpolator.render_rows(template, columns)) == expected
+    assert [row.decode() for row in interpolator.render_rows(
+        template.encode(), columns)] == expected
+
+
+def test_render_rows_without_variable():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = list(interpolator.render_rows('', {'FOO': [1, 2]}))
+    assert actual == ['', '']
+
+
+def test_render_rows_unresolved_key_exception():
+    template = '$ID $NAME'
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    rows = interpolator.render_rows(template, [{'ID': '1', 'NAME': 'foo'},
+                                               {'ID': '2'}])
+    assert next(rows) == '1 foo'
+    with pytest.raises(KeyUnresolvedException):
+        next(rows)
+    with pytest.raises(KeyUnresolvedException):
+        interpolator.render_rows(template, {'ID': ['1', '2'],
+                                            'NAME': ['foo', None]})
+    with pytest.raises(ValueError):
+        interpolator.render_rows(template, {'ID': ['1', '2'],
+                                            'NAME': ['foo']})
+
+
+def test_variables():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    assert interpolator.variables('$A ${B:-x$C} ${A-$D} ${C-y} \\$E') == (
+        VariableInfo('A', False, ('D',)),
+        VariableInfo('B', True, ('C',)),
+        VariableInfo('C', False, ()),
+        VariableInfo('D', False, ()))
+    assert interpolator.variables(b'${A-x}') == (
+        VariableInfo('A', True, ()),)
+    assert interpolator.variables('no variable') == ()
+
+
+def test_analyze_uses_cache():
+    interpolator = ShellInterpolator(fail_on_unresolved=True, cache_size=8)
+    templates = ['$A', '${B-$A}', '$A']
+    assert interpolator.analyze(templates) == [
+        (VariableInfo('A', False, ()),),
+        (VariableInfo('B', True, ('A',)), VariableInfo('A', False, ())),
+        (VariableInfo('A', False, ()),)]
+    assert interpolator.cache_info().hits == 1
+    interpolator.render('$A', DictResolver({'A': 'a'}))
+    assert interpolator.cache_info().hits == 2
+
+
+class CountingResolver(DictResolver):
+    def __init__(self, dict) -> None:
+        super().__init__(dict)
+        self.calls = 0
+
+    def resolve_many(self, keys):
+        self.calls += 1
+        return super().resolve_many(keys)
+
+
+def test_check():
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    resolver = CountingResolver({'FOO': 'foo'})
+    report = interpolator.check({
+        'a.tpl': '$FOO\n  ${NOPE} ${OPT-x}',
+        'b.tpl': 'ok $FOO',
+        'c.tpl': '${OPT:-x$OTHER}\n\\$IGNORED $NOPE',
+    }, resolver)
+    assert resolver.calls == 1
+    assert not report.ok
+    assert report.templates == 3
+    assert report.keys == ('NOPE', 'OTHER')
+    assert report.locations == (
+        UnresolvedLocation('NOPE', 'a.tpl', 7, 2, 3),
+        UnresolvedLocation('OTHER', 'c.tpl', 8, 1, 9),
+        UnresolvedLocation('NOPE', 'c.tpl', 26, 2, 11))
+    exception = report.exception()
+    assert isinstance(exception, KeysUnresolvedException)
+    assert exception.keys == ['NOPE', 'OTHER']
+    assert exception.source == 'a.tpl, c.tpl'
+
+
+def test_check_templates():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    resolver = DictResolver({'FOO': 'foo'})
+    report = interpolator.check('$FOO', resolver)
+    assert report.ok
+    assert report.exception() is None
+    report = interpolator.check([b'$FOO', b'x\n$NOPE'], resolver)
+    assert report.locations == (
+        UnresolvedLocation('NOPE', 'template #1', 2, 2, 1),)
+
+
+def test_disk_cache(tmp_path):
+    disk_cache = DiskCache(str(tmp_path), autoflush=False)
+    interpolator = ShellInterpolator(fail_on_unresolved=True, cache_size=8,
+                                     disk_cache=disk_cache)
+    resolver = DictResolver({'FOO': 'foo', 'BAR': ''})
+    template = 'a $FOO ${BAR:-$FOO}'
+    assert interpolator.render(template, resolver) == 'a foo foo'
+    disk_cache.flush()
+    loaded = DiskCache(str(tmp_path), autoflush=False)
+    assert loaded.get(template) == interpolator.compile(template).segments
+    for codegen in [False, True]:
+        interpolator = ShellInterpolator(fail_on_unresolved=True,
+                                         codegen=codegen,
+                                         disk_cache=loaded)
+        interpolator._parse = None
+        assert interpolator.render(template, resolver) == 'a foo foo'
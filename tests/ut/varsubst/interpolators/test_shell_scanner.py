@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import random
+
+import pytest
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import ShellInterpolator
+from varsubst.interpolators.shell_scanner import scan, unfinished_start
+from varsubst.resolvers import DictResolver
+
+corpus = [
+    '',
+    'no variable',
+    '$',
+    '$$',
+    '$$FOO',
+    '${',
+    '${}',
+    '${FOO',
+    '${FOO}',
+    '${FOO}}',
+    '${FOO-}',
+    '${FOO:-}',
+    '${FOO:}',
+    '${FOO:-default}',
+    '${FOO-default}',
+    '${FOO-$BAR}',
+    '${FOO:-a $BAR b ${BAZ}',
+    '${FOO-${BAR}}',
+    '${FOO$BAR}',
+    '${FOO-a\\$BAR}',
+    '$FOO$BAR',
+    '$FOO-$BAR',
+    '${FOO}${BAR}',
+    '\\$FOO',
+    '\\${FOO}',
+    '\\\\$FOO',
+    'a $FOO_1 b ${BAR_2:-x} c',
+    '${FOO-x\\}$BAR',
+    'trailing $',
+    'trailing ${FOO-',
+]
+
+resolver = DictResolver({'FOO': 'foo', 'BAR': '', 'BAZ': 'baz'})
+
+
+def random_templates(count: int):
+    alphabet = ['$', '{', '}', '-', ':', '\\', 'FOO', 'BAR', 'X', ' ']
+    rnd = random.Random(20201)
+    for _ in range(count):
+        yield ''.join(rnd.choice(alphabet)
+                      for _ in range(rnd.randint(0, 16)))
+
+
+def render(engine: str, template: str, fail_on_unresolved: bool):
+    interpolator = ShellInterpolator(fail_on_unresolved, engine=engine)
+    try:
+        return interpolator.render(template, resolver)
+    except KeyUnresolvedException as e:
+        return KeyUnresolvedException, e.key
+
+
+@pytest.mark.parametrize('template', corpus)
+def test_corpus_same_segments(template):
+    assert scan(template) == ShellInterpolator._parse_regex(template)
+
+
+@pytest.mark.parametrize('template', corpus)
+@pytest.mark.parametrize('fail_on_unresolved', [True, False])
+def test_corpus_same_render(template, fail_on_unresolved):
+    expected = render('regex', template, fail_on_unresolved)
+    actual = render('scanner', template, fail_on_unresolved)
+    assert actual == expected
+
+
+def test_random_same_segments():
+    for template in random_templates(5000):
+        assert scan(template) == ShellInterpolator._parse_regex(template), \
+            template
+
+
+def test_random_same_render():
+    for template in random_templates(2000):
+        for fail_on_unresolved in (True, False):
+            expected = render('regex', template, fail_on_unresolved)
+            actual = render('scanner', template, fail_on_unresolved)
+            assert actual == expected, template
+
+
+def test_values_not_expanded_again():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    actual = interpolator.render(
+        '$FOO', DictResolver({'FOO': '${BAR}', 'BAR': 'bar'}))
+    assert actual == '${BAR}'
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        ShellInterpolator(fail_on_unresolved=True, engine='unknown')
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('', 0),
+    ('abc', 3),
+    ('abc $', 4),
+    ('abc $FO', 4),
+    ('abc $FOO ', 9),
+    ('abc ${', 4),
+    ('abc ${FOO', 4),
+    ('abc ${FOO:', 4),
+    ('abc ${FOO-', 4),
+    ('abc ${FOO:-default $BAR', 4),
+    ('abc ${FOO:-default} $BAR', 20),
+    ('abc ${FOO:x', 11),
+    ('abc \\', 4),
+    ('abc \\$FOO', 9),
+    ('abc $$', 5),
+])
+def test_unfinished_start(text, expected):
+    assert unfinished_start(text) == expected
+
+
+def test_random_same_render_stream():
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    for template in random_templates(500):
+        expected = interpolator.render(template, resolver)
+        for chunk_size in (1, 2, 3, 7):
+            writer = io.StringIO()
+            interpolator.render_stream(io.StringIO(template), writer,
+                                       resolver, chunk_size=chunk_size)
+            assert writer.getvalue() == expected, (template, chunk_size)
+
+
+def test_random_same_render_bytes():
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    for template in random_templates(500):
+        expected = interpolator.render(template, resolver).encode()
+        actual = interpolator.render(template.encode(), resolver)
+        assert actual == expected, template
+
+
+def test_random_same_render_columns():
+    columns = {'FOO': ['foo', '', None], 'BAR': [None, 'bar', '']}
+    rows = [{key: column[i] for key, column in columns.items()}
+            for i in range(3)]
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    for template in random_templates(500):
+        expected = [interpolator.render(template, DictResolver(row))
+                    for row in rows]
+        actual = list(interpolator.render_rows(template, columns))
+        assert actual == expected, template
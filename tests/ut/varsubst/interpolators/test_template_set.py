@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from typing import Iterable
+
+import pytest
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import (RenderedTemplate, ShellInterpolator,
+                                    TemplateSet)
+from varsubst.resolvers import DictResolver
+
+
+class RecordingResolver(DictResolver):
+    def __init__(self, dict):
+        super().__init__(dict)
+        self.batches = []
+
+    def resolve_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        self.batches.append(keys)
+        return super().resolve_many(keys)
+
+
+def test_rendered_template_dependencies():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile('$FOO-${BAR:-$BAZ}-$FOO')
+    rendered = RenderedTemplate(compiled, {'FOO': 'foo', 'BAR': '',
+                                           'BAZ': 'baz'})
+    assert rendered.text == 'foo-baz-foo'
+    assert rendered.dependencies == {'FOO': (0, 4), 'BAR': (2,),
+                                     'BAZ': (2,)}
+
+
+def test_rendered_template_update_patches_segments():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    compiled = interpolator.compile('$FOO-${BAR:-$BAZ}')
+    values = {'FOO': 'foo', 'BAR': '', 'BAZ': 'baz'}
+    rendered = RenderedTemplate(compiled, values)
+    values['BAZ'] = 'qux'
+    assert rendered.update(values, ['BAZ'])
+    assert rendered.parts == ['foo', '-', 'qux']
+    assert rendered.text == 'foo-qux'
+    assert not rendered.update(values, ['BAZ', 'OTHER'])
+    values['FOO'] = None
+    with pytest.raises(KeyUnresolvedException):
+        rendered.update(values, ['FOO'])
+    assert rendered.text == 'foo-qux'
+
+
+def test_template_set_updates_dependents_only():
+    values = {'FOO': 'foo', 'BAR': 'bar', 'BAZ': 'baz'}
+    resolver = RecordingResolver(values)
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            resolver)
+    assert templates.add('a', '$FOO $BAR') == 'foo bar'
+    assert templates.add('b', '${BAR}-$BAZ') == 'bar-baz'
+    assert resolver.batches == [['FOO', 'BAR'], ['BAZ']]
+    assert dict(templates) == {'a': 'foo bar', 'b': 'bar-baz'}
+    assert templates.dependents('BAR') == {'a', 'b'}
+    values['BAZ'] = 'qux'
+    values['FOO'] = 'foo'
+    assert templates.update(['BAZ', 'FOO', 'NOPE']) == {'b'}
+    assert resolver.batches[-1] == ['BAZ', 'FOO']
+    assert templates['b'] == 'bar-qux'
+    values['BAR'] = 'BAR'
+    assert templates.update(['BAR']) == {'a', 'b'}
+    assert dict(templates) == {'a': 'foo BAR', 'b': 'BAR-qux'}
+    assert templates.update([]) == set()
+
+
+def test_template_set_default_keeps_values():
+    values = {'FOO': '', 'BAR': 'bar'}
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            DictResolver(values))
+    templates.add('a', '${FOO:-$BAR}')
+    values['FOO'] = 'foo'
+    assert templates.update(['FOO']) == {'a'}
+    assert templates['a'] == 'foo'
+    values['FOO'] = ''
+    assert templates.update(['FOO']) == {'a'}
+    assert templates['a'] == 'bar'
+
+
+def test_template_set_replace_and_remove():
+    values = {'FOO': 'foo', 'BAR': 'bar'}
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            DictResolver(values))
+    templates.add('a', '$FOO')
+    templates.add('a', '$FOO$BAR')
+    assert templates['a'] == 'foobar'
+    assert templates.dependents('FOO') == {'a'}
+    templates.add('a', '$BAR')
+    assert templates.dependents('FOO') == frozenset()
+    assert templates.rendered('a').keys == {'BAR'}
+    templates.remove('a')
+    assert 'a' not in templates
+    assert len(templates) == 0
+    assert templates.update(['BAR']) == set()
+
+
+def test_template_set_failed_add():
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            DictResolver({'FOO': 'foo'}))
+    templates.add('a', '$FOO')
+    with pytest.raises(KeyUnresolvedException):
+        templates.add('a', '$FOO$NOPE')
+    assert templates['a'] == 'foo'
+    assert templates.dependents('NOPE') == frozenset()
+
+
+def test_template_set_bytes():
+    values = {'FOO': 'foo'}
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            DictResolver(values))
+    assert templates.add('a', b'<$FOO>') == b'<foo>'
+    values['FOO'] = 'bar'
+    assert templates.update(['FOO']) == {'a'}
+    assert templates['a'] == b'<bar>'
+
+
+def test_template_set_failed_update_changes_nothing():
+    values = {'A': '1', 'B': '2'}
+    templates = TemplateSet(ShellInterpolator(fail_on_unresolved=True),
+                            DictResolver(values))
+    templates.add('x', 'a=$A')
+    templates.add('y', 'b=$B a=$A')
+    values['A'] = '5'
+    del values['B']
+    with pytest.raises(KeyUnresolvedException):
+        templates.update(['A', 'B'])
+    assert dict(templates) == {'x': 'a=1', 'y': 'b=2 a=1'}
+    values['B'] = '3'
+    assert templates.update(['B']) == {'y'}
+    assert dict(templates) == {'x': 'a=1', 'y': 'b=3 a=1'}
+    assert templates.update(['A']) == {'x', 'y'}
+    assert dict(templates) == {'x': 'a=5', 'y': 'b=3 a=5'}
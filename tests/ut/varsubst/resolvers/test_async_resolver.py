@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+from typing import Optional
+
+from varsubst.resolvers import AsyncBaseResolver, DictResolver, aresolve_many
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class SlowResolver(AsyncBaseResolver):
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.running = 0
+        self.max_running = 0
+
+    async def resolve(self, key: str) -> Optional[str]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.latency)
+        self.running -= 1
+        return None if key == 'MISSING' else key.lower()
+
+
+def test_resolve_many_concurrently():
+    resolver = SlowResolver(0.01)
+    keys = [f'KEY{i}' for i in range(20)] + ['MISSING']
+    actual = run(resolver.resolve_many(keys))
+    assert actual == {key: None if key == 'MISSING' else key.lower()
+                      for key in keys}
+    assert resolver.max_running == len(keys)
+
+
+def test_resolve_many_concurrency_limit():
+    resolver = SlowResolver(0.01)
+    keys = [f'KEY{i}' for i in range(20)]
+    run(resolver.resolve_many(keys, concurrency=4))
+    assert resolver.max_running == 4
+
+
+def test_aresolve_many():
+    keys = ['FOO', 'MISSING']
+    actual = run(aresolve_many(DictResolver({'FOO': 'bar'}), keys))
+    assert actual == {'FOO': 'bar', 'MISSING': None}
+    actual = run(aresolve_many(SlowResolver(0), keys, concurrency=1))
+    assert actual == {'FOO': 'foo', 'MISSING': None}
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Optional
+
+import pytest
+
+from varsubst import cache
+from varsubst.resolvers import BaseResolver, CachingResolver, DictResolver
+
+
+class CountingResolver(DictResolver):
+    def __init__(self, dict) -> None:
+        super().__init__(dict)
+        self.resolved = []
+
+    def resolve(self, key: str) -> Optional[str]:
+        self.resolved.append(key)
+        return super().resolve(key)
+
+    def resolve_many(self, keys):
+        return BaseResolver.resolve_many(self, keys)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_memoized():
+    inner = CountingResolver({'FOO': 'bar'})
+    resolver = CachingResolver(inner)
+    assert resolver.resolve('FOO') == 'bar'
+    assert resolver.resolve('FOO') == 'bar'
+    assert resolver.resolve('MISSING') is None
+    assert resolver.resolve('MISSING') is None
+    assert inner.resolved == ['FOO', 'MISSING']
+    info = resolver.cache_info()
+    assert (info.hits, info.misses) == (2, 2)
+
+
+def test_lru_eviction():
+    inner = CountingResolver({'A': 'a', 'B': 'b', 'C': 'c'})
+    resolver = CachingResolver(inner, maxsize=2)
+    for key in ['A', 'B', 'A', 'C', 'B']:
+        resolver.resolve(key)
+    assert inner.resolved == ['A', 'B', 'C', 'B']
+    assert resolver.cache_info().evictions == 2
+
+
+def test_ttl(clock):
+    inner = CountingResolver({'FOO': 'bar'})
+    resolver = CachingResolver(inner, ttl=10, negative_ttl=1)
+    resolver.resolve('FOO')
+    resolver.resolve('MISSING')
+    clock[0] = 5
+    resolver.resolve('FOO')
+    resolver.resolve('MISSING')
+    assert inner.resolved == ['FOO', 'MISSING', 'MISSING']
+    clock[0] = 11
+    resolver.resolve('FOO')
+    assert inner.resolved == ['FOO', 'MISSING', 'MISSING', 'FOO']
+
+
+def test_resolve_many():
+    inner = CountingResolver({'FOO': 'bar', 'BAZ': 'qux'})
+    resolver = CachingResolver(inner)
+    resolver.resolve('FOO')
+    actual = resolver.resolve_many(['FOO', 'BAZ', 'MISSING'])
+    assert actual == {'FOO': 'bar', 'BAZ': 'qux', 'MISSING': None}
+    assert inner.resolved == ['FOO', 'BAZ', 'MISSING']
+    resolver.resolve_many(['FOO', 'BAZ', 'MISSING'])
+    assert inner.resolved == ['FOO', 'BAZ', 'MISSING']
+
+
+def test_invalidate_and_clear():
+    values = {'FOO': 'bar'}
+    resolver = CachingResolver(DictResolver(values))
+    resolver.resolve('FOO')
+    values['FOO'] = 'baz'
+    assert resolver.resolve('FOO') == 'bar'
+    resolver.invalidate('FOO')
+    assert resolver.resolve('FOO') == 'baz'
+    values['FOO'] = 'qux'
+    resolver.clear()
+    assert resolver.resolve('FOO') == 'qux'
+    assert resolver.cache_info().currsize == 1
+
+
+def test_values():
+    resolver = CachingResolver(DictResolver({'FOO': 'bar'}))
+    assert resolver.values() == {'FOO': 'bar'}
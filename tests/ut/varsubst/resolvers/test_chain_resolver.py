@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from typing import Iterable
+
+import pytest
+
+from varsubst.resolvers import ChainResolver, DictResolver
+
+
+class RecordingResolver(DictResolver):
+    def __init__(self, dict) -> None:
+        super().__init__(dict)
+        self.lookups = []
+
+    def resolve(self, key: str):
+        self.lookups.append(key)
+        return super().resolve(key)
+
+    def resolve_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        self.lookups.append(keys)
+        return super().resolve_many(keys)
+
+
+@pytest.fixture
+def layers():
+    return (RecordingResolver({'FOO': 'override'}),
+            RecordingResolver({'FOO': 'file', 'BAR': 'bar'}),
+            RecordingResolver({'BAZ': 'baz', 'FOO': 'env'}))
+
+
+@pytest.mark.parametrize('frozen', [False, True])
+def test_precedence(layers, frozen):
+    resolver = ChainResolver(*layers)
+    if frozen:
+        assert resolver.freeze() is resolver
+    assert resolver.frozen == frozen
+    assert resolver.resolve('FOO') == 'override'
+    assert resolver.resolve('BAZ') == 'baz'
+    assert resolver.resolve('NOPE') is None
+    assert resolver.resolve_many(['BAR', 'FOO', 'NOPE', 'BAR']) == {
+        'BAR': 'bar', 'FOO': 'override', 'NOPE': None}
+    assert resolver.values() == {'FOO': 'override', 'BAR': 'bar',
+                                 'BAZ': 'baz'}
+    assert resolver.source('FOO') is layers[0]
+    assert resolver.source('BAR') is layers[1]
+    assert resolver.source('BAZ') is layers[2]
+    assert resolver.source('NOPE') is None
+
+
+def test_live_short_circuits_and_caches_misses(layers):
+    resolver = ChainResolver(*layers)
+    assert resolver.resolve('FOO') == 'override'
+    assert [layer.lookups for layer in layers] == [['FOO'], [], []]
+    assert resolver.resolve('BAZ') == 'baz'
+    assert resolver.resolve('BAZ') == 'baz'
+    assert resolver.resolve('NOPE') is None
+    assert resolver.resolve('NOPE') is None
+    assert [layer.lookups for layer in layers] == [
+        ['FOO', 'BAZ', 'NOPE'], ['BAZ', 'NOPE'], ['BAZ', 'BAZ', 'NOPE']]
+    layers[0].dict['NOPE'] = 'added'
+    assert resolver.resolve('NOPE') is None
+    resolver.clear()
+    assert resolver.resolve('NOPE') == 'added'
+
+
+def test_live_resolve_many_batches(layers):
+    resolver = ChainResolver(*layers)
+    assert resolver.resolve_many(['FOO', 'BAR', 'BAZ', 'NOPE']) == {
+        'FOO': 'override', 'BAR': 'bar', 'BAZ': 'baz', 'NOPE': None}
+    assert [layer.lookups for layer in layers] == [
+        [['FOO', 'BAR', 'BAZ', 'NOPE']], [['BAR', 'BAZ', 'NOPE']],
+        [['BAZ', 'NOPE']]]
+    for layer in layers:
+        layer.lookups.clear()
+    assert resolver.resolve_many(['BAZ', 'NOPE', 'FOO']) == {
+        'BAZ': 'baz', 'NOPE': None, 'FOO': 'override'}
+    assert [layer.lookups for layer in layers] == [[['FOO']], [], [['BAZ']]]
+
+
+def test_frozen_index(layers):
+    resolver = ChainResolver(*layers).freeze()
+    layers[0].dict['BAR'] = 'changed'
+    assert resolver.resolve('BAR') == 'bar'
+    assert [layer.lookups for layer in layers] == [[], [], []]
+    with pytest.raises(TypeError):
+        resolver.values()['BAR'] = 'changed'
+    resolver.freeze()
+    assert resolver.resolve('BAR') == 'changed'
+    resolver.thaw()
+    assert not resolver.frozen
+    assert resolver.resolve('BAR') == 'changed'
+    assert layers[0].lookups == ['BAR']
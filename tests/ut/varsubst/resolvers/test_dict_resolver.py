@@ -46,3 +46,9 @@ def test_values():
     expected = {'Foo': 'bar'}
     actual = DictResolver(expected).values()
     assert actual == expected
+
+
+def test_resolve_many():
+    resolver = DictResolver({'FOO': 'bar', 'EMPTY': ''})
+    actual = resolver.resolve_many(['FOO', 'EMPTY', 'MISSING'])
+    assert actual == {'FOO': 'bar', 'EMPTY': '', 'MISSING': None}
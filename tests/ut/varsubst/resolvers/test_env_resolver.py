@@ -24,6 +24,8 @@
 
 import os
 
+import pytest
+
 from varsubst.resolvers import EnvResolver
 
 
@@ -53,3 +55,31 @@ def test_env_unset():
 def test_values():
     actual = EnvResolver().values()
     assert len(actual) > 0
+
+
+def test_resolve_many():
+    os.environ['FOO'] = 'bar'
+    try:
+        del os.environ['MISSING']
+    except KeyError:
+        pass
+    actual = EnvResolver().resolve_many(['FOO', 'MISSING'])
+    assert actual == {'FOO': 'bar', 'MISSING': None}
+
+
+def test_snapshot():
+    os.environ['FOO'] = 'bar'
+    resolver = EnvResolver(snapshot=True)
+    os.environ['FOO'] = 'baz'
+    assert resolver.resolve('FOO') == 'bar'
+    assert resolver.resolve_many(['FOO']) == {'FOO': 'bar'}
+    assert resolver.values()['FOO'] == 'bar'
+    resolver.refresh()
+    assert resolver.resolve('FOO') == 'baz'
+
+
+def test_snapshot_values_not_copied():
+    resolver = EnvResolver(snapshot=True)
+    assert resolver.values() is resolver.values()
+    with pytest.raises(TypeError):
+        resolver.values()['FOO'] = 'bar'
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+from typing import IO
+
+import pytest
+
+from varsubst import varsubst
+from varsubst.resolvers import DotenvResolver, JsonResolver, YamlResolver
+
+
+class CountingResolver(JsonResolver):
+    parses = 0
+
+    def _parse(self, reader: IO[str]):
+        self.parses += 1
+        return super()._parse(reader)
+
+
+def write_json(path, values, mtime=None):
+    path.write_text(json.dumps(values))
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_dotenv(tmp_path):
+    path = tmp_path / '.env'
+    path.write_text("# comment\n\nexport FOO='f o o'\nBAR = \"bar\"\n"
+                    "EMPTY=\nINVALID\nURL=a=b\n")
+    resolver = DotenvResolver(str(path))
+    assert resolver.values() == {'FOO': 'f o o', 'BAR': 'bar', 'EMPTY': '',
+                                 'URL': 'a=b'}
+    assert resolver.resolve('FOO') == 'f o o'
+    assert resolver.resolve('INVALID') is None
+
+
+def test_json(tmp_path):
+    path = tmp_path / 'values.json'
+    write_json(path, {'FOO': 'foo', 'PORT': 80})
+    resolver = JsonResolver(str(path))
+    assert resolver.resolve_many(['FOO', 'PORT', 'NOPE']) == {
+        'FOO': 'foo', 'PORT': '80', 'NOPE': None}
+
+
+def test_json_scalars(tmp_path):
+    path = tmp_path / 'values.json'
+    values = {'PORT': 80, 'RATIO': 0.5, 'DEBUG': True, 'NULL': None,
+              'HOSTS': ['a', 'b']}
+    write_json(path, values)
+    assert JsonResolver(str(path)).values() == {
+        'PORT': '80', 'RATIO': '0.5', 'DEBUG': 'true', 'NULL': None,
+        'HOSTS': ['a', 'b']}
+    assert varsubst('$PORT $DEBUG', resolver=JsonResolver(str(path))) == \
+        '80 true'
+    assert JsonResolver(str(path), raw=True).values() == values
+
+
+def test_json_not_an_object(tmp_path):
+    path = tmp_path / 'values.json'
+    write_json(path, ['FOO'])
+    with pytest.raises(ValueError):
+        JsonResolver(str(path)).resolve('FOO')
+
+
+def test_yaml(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'values.yaml'
+    path.write_text("FOO: foo\nPORT: 80\nSINCE: 2020-01-31\n")
+    resolver = YamlResolver(str(path))
+    assert resolver.values() == {'FOO': 'foo', 'PORT': '80',
+                                 'SINCE': '2020-01-31'}
+    assert YamlResolver(str(path), raw=True).values()['PORT'] == 80
+    path.write_text("")
+    resolver.reload()
+    assert resolver.values() == {}
+
+
+def test_lazy_parse_and_reload(tmp_path):
+    path = tmp_path / 'values.json'
+    write_json(path, {'FOO': 'foo'}, mtime=10 ** 18)
+    resolver = CountingResolver(str(path), check_interval=0)
+    assert resolver.parses == 0
+    assert resolver.resolve('FOO') == 'foo'
+    values = resolver.values()
+    assert resolver.parses == 1
+    # same size and modification time
+    write_json(path, {'FOO': 'bar'}, mtime=10 ** 18)
+    assert resolver.resolve('FOO') == 'foo'
+    assert resolver.values() is values
+    assert resolver.parses == 1
+    write_json(path, {'FOO': 'bar'}, mtime=10 ** 18 + 1)
+    assert resolver.resolve('FOO') == 'bar'
+    assert resolver.parses == 2
+    write_json(path, {'FOO': 'bars'}, mtime=10 ** 18 + 1)
+    assert resolver.resolve('FOO') == 'bars'
+    resolver.reload()
+    assert resolver.resolve('FOO') == 'bars'
+    assert resolver.parses == 4
+
+
+def test_check_interval(tmp_path):
+    path = tmp_path / 'values.json'
+    write_json(path, {'FOO': 'foo'})
+    resolver = CountingResolver(str(path), check_interval=3600)
+    assert resolver.resolve('FOO') == 'foo'
+    write_json(path, {'FOO': 'changed'})
+    assert resolver.resolve('FOO') == 'foo'
+    resolver.reload()
+    assert resolver.resolve('FOO') == 'changed'
+
+
+def test_values_read_only(tmp_path):
+    path = tmp_path / 'values.json'
+    write_json(path, {'FOO': 'foo'})
+    with pytest.raises(TypeError):
+        JsonResolver(str(path)).values()['FOO'] = 'bar'
+
+
+def test_lookups_dont_stat(tmp_path, monkeypatch):
+    path = tmp_path / 'values.json'
+    write_json(path, {'FOO': 'foo'})
+    resolver = JsonResolver(str(path))
+    stat = os.stat
+    calls = []
+
+    def counting_stat(*args, **kwargs):
+        calls.append(args)
+        return stat(*args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    for _ in range(100):
+        assert resolver.resolve('FOO') == 'foo'
+        resolver.values()
+    assert len(calls) == 1
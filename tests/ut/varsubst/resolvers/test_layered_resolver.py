@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+
+from varsubst.resolvers import (DictResolver, DotenvResolver, EnvResolver,
+                                JsonResolver, LayeredResolver)
+
+
+class CountingResolver(DictResolver):
+    def __init__(self, dict) -> None:
+        super().__init__(dict)
+        self.calls = 0
+
+    def values(self):
+        self.calls += 1
+        return super().values()
+
+
+def test_precedence():
+    resolver = LayeredResolver(DictResolver({'FOO': 'first'}),
+                               DictResolver({'FOO': 'second', 'BAR': 'bar'}))
+    assert resolver.resolve('FOO') == 'first'
+    assert resolver.resolve_many(['FOO', 'BAR', 'NOPE']) == {
+        'FOO': 'first', 'BAR': 'bar', 'NOPE': None}
+    assert resolver.values() == {'FOO': 'first', 'BAR': 'bar'}
+
+
+def test_index_built_once():
+    layer = CountingResolver({'FOO': 'foo'})
+    resolver = LayeredResolver(layer)
+    assert layer.calls == 0
+    assert resolver.resolve('FOO') == 'foo'
+    layer.dict['FOO'] = 'bar'
+    assert resolver.resolve('FOO') == 'foo'
+    assert layer.calls == 1
+    resolver.refresh()
+    assert resolver.resolve('FOO') == 'bar'
+    assert layer.calls == 2
+
+
+def test_file_layer_reload(tmp_path):
+    path = tmp_path / 'values.json'
+    path.write_text(json.dumps({'FOO': 'file', 'BAR': 'bar'}))
+    resolver = LayeredResolver(DictResolver({'BAR': 'override'}),
+                               JsonResolver(str(path), check_interval=0),
+                               DictResolver({'FOO': 'default', 'BAZ': 'baz'}),
+                               check_interval=0)
+    assert resolver.values() == {'FOO': 'file', 'BAR': 'override',
+                                 'BAZ': 'baz'}
+    path.write_text(json.dumps({'BAZ': 'file'}))
+    assert resolver.values() == {'FOO': 'default', 'BAR': 'override',
+                                 'BAZ': 'file'}
+
+
+def test_lookups_dont_stat(tmp_path, monkeypatch):
+    dotenv = tmp_path / '.env'
+    dotenv.write_text('FOO=dotenv\n')
+    values = tmp_path / 'values.json'
+    values.write_text(json.dumps({'FOO': 'json', 'BAR': 'json'}))
+    resolver = LayeredResolver(DotenvResolver(str(dotenv)),
+                               JsonResolver(str(values)), EnvResolver())
+    stat = os.stat
+    calls = []
+
+    def counting_stat(*args, **kwargs):
+        calls.append(args)
+        return stat(*args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    for _ in range(100):
+        assert resolver.resolve('FOO') == 'dotenv'
+        assert resolver.resolve_many(['BAR']) == {'BAR': 'json'}
+        resolver.values()
+    assert len(calls) == 2
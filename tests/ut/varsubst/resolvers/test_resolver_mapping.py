@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+from varsubst.resolvers import DictResolver, ResolverMapping
+
+
+class CountingResolver(DictResolver):
+    def __init__(self, dict) -> None:
+        super().__init__(dict)
+        self.calls = 0
+
+    def resolve(self, key):
+        self.calls += 1
+        return super().resolve(key)
+
+
+def test_lookup():
+    mapping = ResolverMapping(DictResolver({'FOO': 'bar', 'EMPTY': ''}))
+    assert mapping['FOO'] == 'bar'
+    assert mapping['EMPTY'] == ''
+    assert mapping.get('MISSING') is None
+    assert 'FOO' in mapping
+    assert 'MISSING' not in mapping
+    with pytest.raises(KeyError):
+        mapping['MISSING']
+
+
+def test_resolved_once():
+    resolver = CountingResolver({'FOO': 'bar'})
+    mapping = ResolverMapping(resolver)
+    assert 'FOO' in mapping
+    assert mapping['FOO'] == 'bar'
+    assert 'MISSING' not in mapping
+    assert mapping.get('MISSING') is None
+    assert resolver.calls == 2
+
+
+def test_iteration():
+    mapping = ResolverMapping(DictResolver({'FOO': 'bar', 'BAZ': 'qux'}))
+    assert len(mapping) == 2
+    assert dict(mapping) == {'FOO': 'bar', 'BAZ': 'qux'}
+
+
+def test_copy():
+    mapping = ResolverMapping(DictResolver({'FOO': 'bar', 'BAZ': 'qux'}))
+    assert mapping.get('FOO') == 'bar'
+    assert mapping.get('MISSING') is None
+    assert mapping.copy() == {'FOO': 'bar'}
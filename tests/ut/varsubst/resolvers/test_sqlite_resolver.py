@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from varsubst.resolvers import SqliteResolver
+
+
+class CountingResolver(SqliteResolver):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.queries = []
+
+    def _connect(self):
+        connection = super()._connect()
+        connection.set_trace_callback(self.queries.append)
+        return connection
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'values.db')
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE variables (key TEXT PRIMARY KEY, '
+                           'value TEXT)')
+        connection.executemany('INSERT INTO variables VALUES (?, ?)',
+                               [(f'KEY{i}', f'value{i}')
+                                for i in range(2500)])
+    connection.close()
+    return path
+
+
+def test_resolve(database):
+    with SqliteResolver(database) as resolver:
+        assert resolver.resolve('KEY1') == 'value1'
+        assert resolver.resolve('NOPE') is None
+
+
+def test_resolve_many_chunked(database):
+    resolver = CountingResolver(database)
+    keys = [f'KEY{i}' for i in range(2600)] + ['KEY0']
+    values = resolver.resolve_many(keys)
+    assert len(values) == 2600
+    assert values['KEY2499'] == 'value2499'
+    assert values['KEY2500'] is None
+    assert len(resolver.queries) == 3
+    resolver.close()
+
+
+def test_custom_table(tmp_path):
+    path = str(tmp_path / 'values.db')
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE "my params" (name TEXT, val TEXT)')
+        connection.execute('INSERT INTO "my params" VALUES (\'FOO\', \'foo\')')
+    connection.close()
+    resolver = SqliteResolver(path, table='my params', key_column='name',
+                              value_column='val')
+    assert resolver.resolve_many(['FOO']) == {'FOO': 'foo'}
+    assert resolver.values() == {'FOO': 'foo'}
+
+
+def test_warm(database):
+    resolver = CountingResolver(database, warm=True)
+    assert resolver.resolve('KEY1') == 'value1'
+    assert resolver.resolve_many(['KEY2', 'NOPE']) == {
+        'KEY2': 'value2', 'NOPE': None}
+    assert len(resolver.values()) == 2500
+    assert len(resolver.queries) == 1
+    with pytest.raises(TypeError):
+        resolver.values()['KEY1'] = 'changed'
+
+
+def test_pool_shared_by_threads(database):
+    resolver = SqliteResolver(database, pool_size=2)
+    keys = [f'KEY{i}' for i in range(100)]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(resolver.resolve, keys))
+    assert results == [f'value{i}' for i in range(100)]
+    assert len(resolver._connections) <= 2
+    resolver.close()
+    assert resolver.resolve('KEY3') == 'value3'
+
+
+def test_close_while_in_use(database):
+    resolver = SqliteResolver(database, pool_size=1)
+    with resolver._connection() as connection:
+        resolver.close()
+        assert connection.execute('SELECT 1').fetchone() == (1,)
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute('SELECT 1')
+    assert resolver.resolve('KEY1') == 'value1'
+    resolver.close()
+
+
+def test_timeout(database):
+    resolver = SqliteResolver(database, pool_size=1, timeout=0.01)
+    with resolver._connection():
+        with pytest.raises(TimeoutError):
+            resolver.resolve('KEY1')
+    assert resolver.resolve('KEY1') == 'value1'
+    resolver.close()
+
+
+def test_close_wakes_up_waiting_threads(database):
+    resolver = SqliteResolver(database, pool_size=1, timeout=5)
+    with ThreadPoolExecutor(1) as executor:
+        with resolver._connection():
+            future = executor.submit(resolver.resolve, 'KEY1')
+            resolver.close()
+        assert future.result() == 'value1'
+    resolver.close()
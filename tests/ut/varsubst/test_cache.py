@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from threading import Thread
+
+import pytest
+
+from varsubst import cache
+from varsubst.cache import CacheInfo, LRUCache
+
+
+def test_get_put():
+    cache = LRUCache(2)
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    assert cache.info() == CacheInfo(hits=1, misses=1, evictions=0,
+                                     maxsize=2, currsize=1)
+
+
+def test_least_recently_used_evicted():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.info().evictions == 1
+    assert len(cache) == 2
+
+
+def test_clear():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.clear()
+    assert cache.info() == CacheInfo(0, 0, 0, 2, 0)
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_threads():
+    cache = LRUCache(8)
+
+    def work(offset):
+        for i in range(1000):
+            key = (offset + i) % 16
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    threads = [Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.info()
+    assert info.hits + info.misses == 8000
+    assert info.currsize == 8
+
+
+def test_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache, 'monotonic', lambda: now[0])
+    lru = LRUCache(2)
+    lru.put('a', 1, ttl=10)
+    lru.put('b', 2)
+    now[0] = 10
+    assert lru.get('a') is None
+    assert lru.get('b') == 2
+    assert lru.info().currsize == 1
+
+
+def test_pop():
+    lru = LRUCache(2)
+    lru.put('a', 1)
+    lru.pop('a')
+    lru.pop('missing')
+    assert lru.get('a') is None
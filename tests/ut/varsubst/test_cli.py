@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+from varsubst.cli import main
+
+
+def run(monkeypatch, capsys, argv, stdin=''):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+    status = main(argv)
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def test_stdin_to_stdout(monkeypatch, capsys):
+    monkeypatch.setenv('VARSUBST_CLI_FOO', 'foo')
+    status, out, err = run(monkeypatch, capsys, [],
+                           'a $VARSUBST_CLI_FOO ${VARSUBST_CLI_NOPE-b}\n')
+    assert (status, out, err) == (0, 'a foo b\n', '')
+
+
+def test_fail_on_unresolved(monkeypatch, capsys):
+    monkeypatch.delenv('VARSUBST_CLI_NOPE', raising=False)
+    status, out, _ = run(monkeypatch, capsys, [], '<$VARSUBST_CLI_NOPE>')
+    assert (status, out) == (0, '<>')
+    status, _, err = run(monkeypatch, capsys, ['--fail-on-unresolved'],
+                         '<$VARSUBST_CLI_NOPE>')
+    assert status == 1
+    assert 'VARSUBST_CLI_NOPE' in err
+
+
+def test_dotenv_resolver(tmp_path, monkeypatch, capsys):
+    values = tmp_path / '.env'
+    values.write_text("# comment\nexport FOO='f o o'\nBAR=bar\n\n")
+    status, out, _ = run(monkeypatch, capsys,
+                         ['-r', 'dotenv', '-f', str(values)], '$FOO $BAR')
+    assert (status, out) == (0, 'f o o bar')
+
+
+def test_json_resolver(tmp_path, monkeypatch, capsys):
+    values = tmp_path / 'values.json'
+    values.write_text(json.dumps({'FOO': 'foo', 'PORT': 80}))
+    status, out, _ = run(monkeypatch, capsys,
+                         ['-r', 'json', '-f', str(values)], '$FOO:$PORT')
+    assert (status, out) == (0, 'foo:80')
+
+
+def test_resolver_requires_values(monkeypatch, capsys):
+    status, _, err = run(monkeypatch, capsys, ['-r', 'json'], '')
+    assert status == 1
+    assert '--values' in err
+
+
+def test_jinja_interpolator(monkeypatch, capsys):
+    monkeypatch.setenv('VARSUBST_CLI_FOO', 'foo')
+    status, out, _ = run(monkeypatch, capsys, ['-i', 'jinja'],
+                         '{{ VARSUBST_CLI_FOO }}')
+    assert (status, out) == (0, 'foo')
+    status, _, err = run(monkeypatch, capsys,
+                         ['-i', 'jinja', '--fail-on-unresolved'],
+                         '{{ VARSUBST_CLI_NOPE }}')
+    assert status == 1
+    assert 'VARSUBST_CLI_NOPE' in err
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_files_and_tree(tmp_path, monkeypatch, capsys, jobs):
+    monkeypatch.setenv('VARSUBST_CLI_FOO', 'foo')
+    (tmp_path / 'a.tpl').write_text('a $VARSUBST_CLI_FOO')
+    tree = tmp_path / 'tree'
+    (tree / 'sub').mkdir(parents=True)
+    (tree / 'b.tpl').write_text('b $VARSUBST_CLI_FOO')
+    (tree / 'sub' / 'c.tpl').write_text('c $VARSUBST_CLI_FOO')
+    out = tmp_path / 'out'
+    status, _, err = run(monkeypatch, capsys, [
+        '-j', jobs, '--stats',
+        f"{tmp_path / 'a.tpl'}:{tmp_path / 'a.conf'}", f"{tree}:{out}"])
+    assert status == 0
+    assert (tmp_path / 'a.conf').read_text() == 'a foo'
+    assert (out / 'b.tpl').read_text() == 'b foo'
+    assert (out / 'sub' / 'c.tpl').read_text() == 'c foo'
+    assert '3 template(s) rendered' in err
+
+
+@pytest.mark.parametrize('interpolator, template', [
+    ('shell', 'a $VARSUBST_CLI_FOO'), ('jinja', 'a {{ VARSUBST_CLI_FOO }}')])
+def test_files_in_place(tmp_path, monkeypatch, capsys, interpolator,
+                        template):
+    monkeypatch.setenv('VARSUBST_CLI_FOO', 'foo')
+    (tmp_path / 'a.conf').write_text(template)
+    tree = tmp_path / 'tree'
+    tree.mkdir()
+    (tree / 'b.conf').write_text(template)
+    status, _, err = run(monkeypatch, capsys, [
+        '-i', interpolator, f"{tmp_path / 'a.conf'}:{tmp_path / 'a.conf'}",
+        f"{tree}:{tree}"])
+    assert (status, err) == (0, '')
+    assert (tmp_path / 'a.conf').read_text() == 'a foo'
+    assert (tree / 'b.conf').read_text() == 'a foo'
+    assert os.listdir(tree) == ['b.conf']
+
+
+def test_stats(monkeypatch, capsys):
+    status, _, err = run(monkeypatch, capsys, ['--stats'], '$A $B $A')
+    assert status == 0
+    assert '1 template(s) rendered' in err
+    assert '2 key(s) resolved' in err
+
+
+def test_invalid_pair(monkeypatch, capsys):
+    status, _, err = run(monkeypatch, capsys, ['in.tpl'])
+    assert status == 1
+    assert 'in:out' in err
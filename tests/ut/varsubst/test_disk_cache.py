@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import gc
+import os
+import pickle
+import weakref
+
+from varsubst import disk_cache as disk_cache_module
+from varsubst.disk_cache import DiskCache
+from varsubst.version import __version__
+
+
+def test_disk_cache(tmp_path):
+    disk_cache = DiskCache(str(tmp_path / 'cache'), autoflush=False)
+    assert disk_cache.get('$FOO') is None
+    disk_cache.put('$FOO', ('a', ('FOO', None, None)))
+    disk_cache.put(b'$FOO', (b'b',))
+    assert disk_cache.get('$FOO') == ('a', ('FOO', None, None))
+    assert disk_cache.get(b'$FOO') == (b'b',)
+    assert not os.path.exists(disk_cache.path)
+    disk_cache.flush()
+    assert __version__ in os.path.basename(disk_cache.path)
+    assert os.listdir(tmp_path / 'cache') == [
+        os.path.basename(disk_cache.path)]
+    loaded = DiskCache(str(tmp_path / 'cache'), autoflush=False)
+    assert loaded.get('$FOO') == ('a', ('FOO', None, None))
+    assert len(loaded) == 2
+
+
+def test_disk_cache_merges_processes(tmp_path):
+    first = DiskCache(str(tmp_path), autoflush=False)
+    second = DiskCache(str(tmp_path), autoflush=False)
+    first.put('a', 1)
+    second.put('b', 2)
+    first.flush()
+    second.flush()
+    first.put('c', 3)
+    first.flush()
+    loaded = DiskCache(str(tmp_path), autoflush=False)
+    assert [loaded.get(key) for key in 'abc'] == [1, 2, 3]
+
+
+def test_disk_cache_version(tmp_path, monkeypatch):
+    disk_cache = DiskCache(str(tmp_path), autoflush=False)
+    disk_cache.put('a', 1)
+    disk_cache.flush()
+    monkeypatch.setattr(disk_cache_module, '__version__', '0.0.0')
+    assert DiskCache(str(tmp_path), autoflush=False).get('a') is None
+
+
+def test_disk_cache_corrupted(tmp_path):
+    disk_cache = DiskCache(str(tmp_path), autoflush=False)
+    with open(disk_cache.path, 'wb') as writer:
+        writer.write(b'not marshal')
+    assert disk_cache.get('a') is None
+    disk_cache.put('a', 1)
+    disk_cache.flush()
+    assert DiskCache(str(tmp_path), autoflush=False).get('a') == 1
+
+
+def test_disk_cache_pickle(tmp_path):
+    disk_cache = DiskCache(str(tmp_path), autoflush=False)
+    disk_cache.put('a', 1)
+    disk_cache.flush()
+    copy = pickle.loads(pickle.dumps(disk_cache))
+    assert copy.get('a') == 1
+
+
+def test_disk_cache_reloads_other_processes(tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(disk_cache_module, 'monotonic', lambda: now[0])
+    first = DiskCache(str(tmp_path), autoflush=False)
+    second = DiskCache(str(tmp_path), autoflush=False)
+    assert first.get('a') is None
+    second.put('a', 1)
+    second.flush()
+    assert first.get('a') is None
+    now[0] = 1
+    assert first.get('a') == 1
+
+
+def test_disk_cache_autoflush(tmp_path):
+    disk_cache = DiskCache(str(tmp_path))
+    copy = pickle.loads(pickle.dumps(disk_cache))
+    disk_cache.put('a', 1)
+    copy.put('b', 2)
+    assert {disk_cache, copy} <= set(disk_cache_module._autoflushed)
+    disk_cache_module._flush_at_exit()
+    loaded = DiskCache(str(tmp_path), autoflush=False)
+    assert [loaded.get(key) for key in 'ab'] == [1, 2]
+
+
+def test_disk_cache_autoflush_does_not_keep_cache_alive(tmp_path):
+    disk_cache = DiskCache(str(tmp_path))
+    reference = weakref.ref(disk_cache)
+    del disk_cache
+    gc.collect()
+    assert reference() is None
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pickle
+
+import pytest
+
+from varsubst.exceptions import KeyUnresolvedException
+from varsubst.interpolators import ShellInterpolator
+from varsubst.interpolators.jinja_interpolator import JinjaInterpolator
+from varsubst.observers import RenderObserver, RenderStats, StatsAggregator
+from varsubst.resolvers import DictResolver
+
+resolver = DictResolver({'FOO': 'foo', 'EMPTY': ''})
+
+
+class ListObserver(RenderObserver):
+    def __init__(self) -> None:
+        self.stats = []
+
+    def on_render(self, stats: RenderStats) -> None:
+        self.stats.append(stats)
+
+
+def stats(**kwargs) -> RenderStats:
+    values = dict(parse_time=0.0, render_time=0.0, resolve_calls=1,
+                  distinct_keys=1, cache_hit=False, defaults_taken=0,
+                  unresolved_keys=(), output_size=0)
+    values.update(kwargs)
+    return RenderStats(**values)
+
+
+def test_shell_stats():
+    interpolator = ShellInterpolator(fail_on_unresolved=False, cache_size=8)
+    observer = ListObserver()
+    interpolator.add_observer(observer)
+    template = '$FOO ${EMPTY:-$FOO} ${NOPE-x} ${FOO-y} $NOPE'
+    assert interpolator.render(template, resolver) == 'foo foo x foo '
+    interpolator.render(template, resolver)
+    first, second = observer.stats
+    assert first.parse_time > 0
+    assert not first.cache_hit
+    assert first.resolve_calls == 1
+    assert first.distinct_keys == 3
+    assert first.defaults_taken == 2
+    assert first.unresolved_keys == ('NOPE',)
+    assert first.output_size == 14
+    assert first.render_time >= first.parse_time
+    assert second.cache_hit
+    assert second.parse_time == 0
+
+
+def test_shell_failed_render():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    observer = ListObserver()
+    interpolator.add_observer(observer)
+    with pytest.raises(KeyUnresolvedException):
+        interpolator.render('$FOO $NOPE', resolver)
+    assert observer.stats[0].unresolved_keys == ('NOPE',)
+    assert observer.stats[0].output_size == 0
+
+
+def test_jinja_stats():
+    interpolator = JinjaInterpolator()
+    observer = ListObserver()
+    interpolator.add_observer(observer)
+    assert interpolator.render('{{ FOO }}{{ NOPE }}', resolver) == 'foo'
+    interpolator.render('{{ FOO }}{{ NOPE }}', resolver)
+    first, second = observer.stats
+    assert not first.cache_hit
+    assert first.distinct_keys == 2
+    assert first.defaults_taken is None
+    assert first.unresolved_keys == ('NOPE',)
+    assert first.output_size == 3
+    assert second.cache_hit
+
+
+def test_remove_observer_and_pickle():
+    interpolator = ShellInterpolator(fail_on_unresolved=True)
+    observer = ListObserver()
+    interpolator.add_observer(observer)
+    interpolator.add_observer(StatsAggregator())
+    assert pickle.loads(pickle.dumps(interpolator))._observers == ()
+    interpolator.remove_observer(observer)
+    interpolator.render('$FOO', resolver)
+    assert observer.stats == []
+
+
+def test_aggregator():
+    aggregator = StatsAggregator(maxlen=100)
+    for size in range(1, 101):
+        aggregator.on_render(stats(output_size=size, cache_hit=size > 10,
+                                   unresolved_keys=('NOPE',) * (size % 2)))
+    aggregator.on_render(stats(output_size=1000, defaults_taken=None))
+    assert aggregator.percentile('output_size', 50) == 51
+    assert aggregator.percentile('output_size', 100) == 1000
+    exported = aggregator.export(percents=[50, 99.9])
+    assert exported['count'] == 101
+    assert exported['cache_hits'] == 90
+    assert exported['unresolved_keys'] == {'NOPE': 50}
+    assert exported['output_size'] == {'p50': 51, 'p99.9': 1000,
+                                       'mean': 6049 / 100, 'max': 1000}
+    assert exported['defaults_taken']['max'] == 0
+    aggregator.reset()
+    assert aggregator.percentile('output_size', 50) is None
+    assert aggregator.export()['parse_time'] == {}
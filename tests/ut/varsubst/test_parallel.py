@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# MIT License
+#
+# Copyright (c) 2020 Bounkong Khamphousone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and
+# this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pickle
+
+import pytest
+from jinja2 import Environment
+
+from varsubst.exceptions import KeysUnresolvedException, KeyUnresolvedException
+from varsubst.interpolators import ShellInterpolator
+from varsubst.interpolators.jinja_interpolator import JinjaInterpolator
+from varsubst.parallel import render_files, render_templates
+from varsubst.resolvers import DictResolver
+
+resolver = DictResolver({'FOO': 'foo', 'BAR': 'bar'})
+
+
+@pytest.mark.parametrize('threshold', [0, 1000])
+def test_render_templates(threshold):
+    templates = [f'{i} $FOO ${{BAR}}' for i in range(50)]
+    expected = [f'{i} foo bar' for i in range(50)]
+    actual = render_templates(templates, resolver=resolver, max_workers=2,
+                              chunksize=8, threshold=threshold)
+    assert actual == expected
+
+
+@pytest.mark.parametrize('threshold', [0, 1000])
+def test_render_templates_unresolved_key(threshold):
+    templates = ['$FOO', '$FOO $MISSING']
+    with pytest.raises(KeyUnresolvedException) as e:
+        render_templates(templates, resolver=resolver, max_workers=2,
+                         threshold=threshold)
+    assert e.value.key == 'MISSING'
+    assert e.value.source == 'template #1'
+
+
+@pytest.mark.parametrize('threshold', [0, 1000])
+def test_render_files(tmp_path, threshold):
+    paths = []
+    out_paths = []
+    for i in range(10):
+        path = tmp_path / f'{i}.tpl'
+        path.write_text(f'{i} $FOO ${{BAR}}')
+        paths.append(str(path))
+        out_paths.append(str(tmp_path / f'{i}.out'))
+    expected = [f'{i} foo bar' for i in range(10)]
+    actual = render_files(paths, resolver=resolver, max_workers=2,
+                          threshold=threshold)
+    assert actual == expected
+    actual = render_files(paths, out_paths, resolver=resolver,
+                          max_workers=2, threshold=threshold)
+    assert actual == out_paths
+    assert [(tmp_path / f'{i}.out').read_text() for i in range(10)] == \
+        expected
+
+
+def test_render_files_unresolved_key(tmp_path):
+    path = tmp_path / 'missing.tpl'
+    path.write_text('$MISSING')
+    with pytest.raises(KeyUnresolvedException) as e:
+        render_files([str(path)], resolver=resolver, max_workers=2,
+                     threshold=0)
+    assert e.value.source == str(path)
+    assert str(path) in str(e.value)
+
+
+def test_render_files_jinja(tmp_path):
+    path = tmp_path / 'template.j2'
+    path.write_text('{{ FOO }} {{ BAR }}')
+    out_path = tmp_path / 'rendered'
+    render_files([str(path)], [str(out_path)],
+                 interpolator=JinjaInterpolator(Environment()),
+                 resolver=resolver, max_workers=2, threshold=0)
+    assert out_path.read_text() == 'foo bar'
+
+
+def test_pickle_exceptions():
+    e = pickle.loads(pickle.dumps(KeyUnresolvedException('FOO', 'a.tpl')))
+    assert (e.key, e.source) == ('FOO', 'a.tpl')
+    e = pickle.loads(pickle.dumps(KeysUnresolvedException(['FOO', 'BAR'])))
+    assert (e.keys, e.key, e.source) == (['FOO', 'BAR'], 'FOO', None)
+
+
+def test_pickle_interpolator():
+    interpolator = ShellInterpolator(fail_on_unresolved=True, cache_size=2,
+                                     codegen=True)
+    interpolator.compile('$FOO')
+    copy = pickle.loads(pickle.dumps(interpolator))
+    assert copy.cache_info().currsize == 0
+    assert copy.cache_info().maxsize == 2
+    assert copy.render('$FOO', resolver) == 'foo'
@@ -22,9 +22,18 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
+import os
+import subprocess
+import sys
 from typing import Optional
 
-from varsubst import varsubst
+import pytest
+
+import varsubst as varsubst_package
+from varsubst import avarsubst, varsubst, varsubst_many
+from varsubst.exceptions import KeysUnresolvedException
+from varsubst.interpolators import ShellInterpolator
 from varsubst.resolvers import BaseResolver
 
 resolved_suffix = '_resolved'
@@ -48,3 +57,60 @@ def test_simple():
     test_str = test_fmt.format('$FOO')
     actual = varsubst(test_str, resolver=DummyResolver())
     assert actual == expected
+
+
+def test_default_interpolator_not_cached():
+    assert varsubst_package._default_interpolator.cache_info() is None
+
+
+def test_async():
+    test_fmt = 'foo {0} bar'
+    expected = test_fmt.format('FOO' + resolved_suffix)
+    test_str = test_fmt.format('$FOO')
+    loop = asyncio.new_event_loop()
+    try:
+        actual = loop.run_until_complete(
+            avarsubst(test_str, resolver=DummyResolver()))
+    finally:
+        loop.close()
+    assert actual == expected
+
+
+class CountingResolver(DummyResolver):
+    def __init__(self) -> None:
+        self.resolved = []
+
+    def resolve(self, key: str) -> Optional[str]:
+        self.resolved.append(key)
+        return super().resolve(key)
+
+
+def test_many():
+    templates = ['$FOO $BAR', '$BAR', '$BAZ' + unresolved_suffix]
+    interpolator = ShellInterpolator(fail_on_unresolved=False)
+    resolver = CountingResolver()
+    actual = varsubst_many(templates, interpolator=interpolator,
+                           resolver=resolver)
+    assert actual == ['FOO_resolved BAR_resolved', 'BAR_resolved', '']
+    assert resolver.resolved == ['FOO', 'BAR', 'BAZ' + unresolved_suffix]
+
+
+def test_many_unresolved_keys():
+    templates = ['$FOO' + unresolved_suffix, '$BAR',
+                 '${BAZ' + unresolved_suffix + '}']
+    with pytest.raises(KeysUnresolvedException) as e:
+        varsubst_many(templates, resolver=DummyResolver())
+    assert e.value.keys == ['FOO' + unresolved_suffix,
+                            'BAZ' + unresolved_suffix]
+    assert e.value.key == 'FOO' + unresolved_suffix
+
+
+@pytest.mark.parametrize('module', ['asyncio', 'sqlite3',
+                                    'multiprocessing', 'tempfile'])
+def test_import_is_lazy(module):
+    source = os.path.dirname(os.path.dirname(varsubst_package.__file__))
+    code = f"import sys, varsubst.cli; print({module!r} in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code],
+                            env=dict(os.environ, PYTHONPATH=source),
+                            stdout=subprocess.PIPE, check=True).stdout
+    assert output.strip() == b'False'